@@ -14,9 +14,17 @@ library HTTP server for the time being.
 """
 
 from .config import AppConfig, load_app_config  # noqa: F401
+from .forms import (
+    FormData,
+    MultipartError,
+    MultipartParser,
+    UploadedFile,
+    parse_options_header,
+)  # noqa: F401
 from .logging import configure_logging  # noqa: F401
 from .persistence import (
     AuditLogger,
+    CoalescingSnapshotWriter,
     CSVDataLoader,
     RuntimeSnapshotStore,
     SettingsStore,
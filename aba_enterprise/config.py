@@ -27,6 +27,8 @@ class AppConfig:
         Timeout, in seconds, used for outbound webhook invocations.
     audit_log_enabled:
         Indicates whether audit logging should be persisted to disk.
+    max_upload_bytes:
+        Largest request body, in bytes, accepted by the CSV upload endpoint.
     """
 
     runtime_dir: Path
@@ -35,6 +37,7 @@ class AppConfig:
     data_retention_days: int = 30
     webhook_timeout: float = 10.0
     audit_log_enabled: bool = True
+    max_upload_bytes: int = 25 * 1024 * 1024
 
     @property
     def is_production(self) -> bool:
@@ -89,6 +92,7 @@ def load_app_config(base_dir: Optional[str] = None) -> AppConfig:
     retention = _coerce_int(os.environ.get("ABA_DATA_RETENTION_DAYS"), 30)
     webhook_timeout = _coerce_float(os.environ.get("ABA_WEBHOOK_TIMEOUT"), 10.0)
     audit_logging = _coerce_bool(os.environ.get("ABA_AUDIT_LOG_ENABLED"), True)
+    max_upload_bytes = _coerce_int(os.environ.get("ABA_MAX_UPLOAD_BYTES"), 25 * 1024 * 1024)
 
     return AppConfig(
         runtime_dir=runtime_root,
@@ -97,4 +101,5 @@ def load_app_config(base_dir: Optional[str] = None) -> AppConfig:
         data_retention_days=retention,
         webhook_timeout=webhook_timeout,
         audit_log_enabled=audit_logging,
+        max_upload_bytes=max_upload_bytes,
     )
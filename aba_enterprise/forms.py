@@ -0,0 +1,324 @@
+"""Request body parsing helpers for the ABA Sign-In app.
+
+The legacy handlers relied on :mod:`cgi`, which is deprecated and buffers
+whole request bodies. The helpers here parse ``multipart/form-data`` bodies
+incrementally from the request stream using only the standard library.
+"""
+
+from __future__ import annotations
+
+import io
+import queue
+import re
+import tempfile
+from dataclasses import dataclass, field
+from typing import IO, BinaryIO, Dict, List, Optional, Tuple
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_SPOOL_SIZE = 1024 * 1024
+MAX_PART_HEADER_SIZE = 16 * 1024
+MAX_FIELD_SIZE = 64 * 1024
+# Disk spools buffer this much before writing, so a large upload reaches the
+# kernel in a few big writes instead of one per network chunk.
+SPOOL_WRITE_BUFFER = 1024 * 1024
+
+# Read buffers are recycled between requests so each upload does not allocate
+# a fresh ``bytes`` object per chunk.
+_READ_BUFFER_POOL: "queue.LifoQueue[bytearray]" = queue.LifoQueue(maxsize=8)
+
+# File parts are spooled into recycled objects too: in-memory buffers, and a
+# few anonymous temp files so large uploads skip the create/unlink syscalls.
+_MEMORY_SPOOL_POOL: "queue.LifoQueue[io.BytesIO]" = queue.LifoQueue(maxsize=32)
+_DISK_SPOOL_POOL: "queue.LifoQueue[IO[bytes]]" = queue.LifoQueue(maxsize=4)
+
+_PARAM_RE = re.compile(r';\s*([^\s=;]+)\s*=\s*("(?:[^"\\]|\\.)*"|[^;]*)')
+_QUOTED_PAIR_RE = re.compile(r"\\(.)")
+
+
+class MultipartError(ValueError):
+    """Raised when a ``multipart/form-data`` body is malformed or too large."""
+
+
+def _acquire_read_buffer(size: int) -> bytearray:
+    try:
+        buffer = _READ_BUFFER_POOL.get_nowait()
+    except queue.Empty:
+        return bytearray(size)
+    return buffer if len(buffer) >= size else bytearray(size)
+
+
+def _release_read_buffer(buffer: bytearray) -> None:
+    try:
+        _READ_BUFFER_POOL.put_nowait(buffer)
+    except queue.Full:
+        pass
+
+
+def _acquire_spool(on_disk: bool) -> IO[bytes]:
+    pool = _DISK_SPOOL_POOL if on_disk else _MEMORY_SPOOL_POOL
+    try:
+        return pool.get_nowait()
+    except queue.Empty:
+        return tempfile.TemporaryFile(buffering=SPOOL_WRITE_BUFFER) if on_disk else io.BytesIO()
+
+
+def _release_spool(handle: IO[bytes]) -> None:
+    """Empty ``handle`` and return it to its pool, closing it if the pool is full."""
+    if handle.closed:
+        return
+    handle.seek(0)
+    handle.truncate(0)
+    pool = _MEMORY_SPOOL_POOL if isinstance(handle, io.BytesIO) else _DISK_SPOOL_POOL
+    try:
+        pool.put_nowait(handle)
+    except queue.Full:
+        handle.close()
+
+
+def parse_options_header(value: Optional[str]) -> Tuple[str, Dict[str, str]]:
+    """Split a header such as ``Content-Type`` into its value and parameters.
+
+    The main value and parameter names are lower-cased; quoted parameter
+    values are unquoted.
+    """
+
+    if not value:
+        return "", {}
+    main, sep, rest = value.partition(";")
+    params: Dict[str, str] = {}
+    for match in _PARAM_RE.finditer(sep + rest):
+        name, raw = match.group(1).lower(), match.group(2).strip()
+        if len(raw) >= 2 and raw[0] == raw[-1] == '"':
+            raw = _QUOTED_PAIR_RE.sub(r"\1", raw[1:-1])
+        params[name] = raw
+    return main.strip().lower(), params
+
+
+@dataclass
+class UploadedFile:
+    """A file part of a multipart form, rewound and ready to read."""
+
+    name: str
+    filename: str
+    content_type: str
+    file: BinaryIO
+
+
+@dataclass
+class FormData:
+    """Fields and files decoded from a multipart body."""
+
+    fields: Dict[str, str] = field(default_factory=dict)
+    files: Dict[str, UploadedFile] = field(default_factory=dict)
+
+    def close(self) -> None:
+        """Release uploaded files for reuse; they must not be read afterwards."""
+        files, self.files = self.files, {}
+        for upload in files.values():
+            _release_spool(upload.file)
+
+
+class _Part:
+    """Accumulates the body of the part currently being parsed."""
+
+    def __init__(self, headers: Dict[str, str], spool_size: int) -> None:
+        disposition, params = parse_options_header(headers.get("content-disposition"))
+        if disposition != "form-data" or "name" not in params:
+            raise MultipartError("Part is missing a form-data Content-Disposition")
+        self.name = params["name"]
+        self.filename: Optional[str] = params.get("filename")
+        self.content_type = headers.get("content-type", "")
+        self.size = 0
+        self._spool_size = spool_size
+        self.sink: Optional[IO[bytes]] = _FieldBuffer() if self.filename is None else _acquire_spool(on_disk=False)
+
+    def write(self, data) -> None:
+        if not data:
+            return
+        self.size += len(data)
+        if self.filename is None:
+            if self.size > MAX_FIELD_SIZE:
+                raise MultipartError(f"Field {self.name!r} exceeds {MAX_FIELD_SIZE} bytes")
+        elif self.size > self._spool_size and isinstance(self.sink, io.BytesIO):
+            # Large uploads move to disk. Done by hand rather than with
+            # SpooledTemporaryFile, which cannot back a TextIOWrapper before 3.11.
+            spilled = _acquire_spool(on_disk=True)
+            spilled.write(self.sink.getbuffer())
+            _release_spool(self.sink)
+            self.sink = spilled
+        self.sink.write(data)
+
+    def detach(self) -> IO[bytes]:
+        """Hand the finished body over; a later :meth:`close` leaves it alone."""
+        sink, self.sink = self.sink, None
+        return sink
+
+    def close(self) -> None:
+        if self.sink is None:
+            return
+        if self.filename is None:
+            self.sink.close()
+        else:
+            _release_spool(self.sink)
+        self.sink = None
+
+
+class _FieldBuffer(bytearray):
+    """Minimal writable sink for small, non-file fields."""
+
+    def write(self, data) -> None:
+        self.extend(data)
+
+    def close(self) -> None:
+        self.clear()
+
+
+class MultipartParser:
+    """Incrementally parse a ``multipart/form-data`` body from a stream.
+
+    The body is read in ``chunk_size`` pieces until ``content_length`` bytes
+    have been consumed, so memory use does not grow with the upload. File
+    parts stay in memory up to ``spool_size`` bytes and are moved to an
+    anonymous temporary file beyond that; other parts are decoded as UTF-8
+    strings.
+    """
+
+    def __init__(
+        self,
+        boundary: bytes,
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        spool_size: int = DEFAULT_SPOOL_SIZE,
+    ) -> None:
+        if not boundary or len(boundary) > 70:
+            raise MultipartError("Invalid multipart boundary")
+        self._delimiter = b"--" + boundary
+        self._part_delimiter = b"\r\n" + self._delimiter
+        self._chunk_size = chunk_size
+        self._spool_size = spool_size
+
+    def parse(self, stream: BinaryIO, content_length: int) -> FormData:
+        form = FormData()
+        buf = bytearray()
+        state = "preamble"
+        part: Optional[_Part] = None
+        remaining = content_length
+        read_buffer = _acquire_read_buffer(self._chunk_size)
+        view = memoryview(read_buffer)
+        readinto = getattr(stream, "readinto", None)
+        try:
+            while True:
+                state, part = self._process(buf, state, part, form)
+                if state == "done":
+                    return form
+                if remaining <= 0:
+                    raise MultipartError("Multipart body ended before the closing boundary")
+                want = min(self._chunk_size, remaining)
+                if readinto is not None:
+                    count = readinto(view[:want])
+                    chunk = view[:count]
+                else:
+                    chunk = stream.read(want)
+                    count = len(chunk)
+                if not count:
+                    raise MultipartError("Connection closed before the body was received")
+                remaining -= count
+                buf += chunk
+        except BaseException:
+            if part is not None:
+                part.close()
+            form.close()
+            raise
+        finally:
+            view.release()
+            _release_read_buffer(read_buffer)
+
+    def _process(
+        self, buf: bytearray, state: str, part: Optional[_Part], form: FormData
+    ) -> Tuple[str, Optional[_Part]]:
+        """Consume as much of ``buf`` as possible and return the new state."""
+
+        delimiter = self._delimiter
+        part_delimiter = self._part_delimiter
+        while True:
+            if state == "preamble":
+                idx = buf.find(delimiter)
+                if idx < 0:
+                    # Keep enough of the tail to recognise a split delimiter.
+                    del buf[: max(0, len(buf) - len(delimiter))]
+                    return state, part
+                end = idx + len(delimiter)
+                if len(buf) < end + 2:
+                    return state, part
+                state = self._after_delimiter(buf[end:end + 2])
+                del buf[: end + 2]
+                if state == "done":
+                    return state, part
+            elif state == "headers":
+                idx = buf.find(b"\r\n\r\n")
+                if idx < 0:
+                    if len(buf) > MAX_PART_HEADER_SIZE:
+                        raise MultipartError("Part headers are too large")
+                    return state, part
+                part = _Part(self._parse_part_headers(bytes(buf[:idx])), self._spool_size)
+                del buf[: idx + 4]
+                state = "body"
+            else:
+                idx = buf.find(part_delimiter)
+                if idx < 0:
+                    keep = len(part_delimiter) - 1
+                    if len(buf) > keep:
+                        flushable = len(buf) - keep
+                        part.write(buf[:flushable])
+                        del buf[:flushable]
+                    return state, part
+                end = idx + len(part_delimiter)
+                if len(buf) < end + 2:
+                    part.write(buf[:idx])
+                    del buf[:idx]
+                    return state, part
+                part.write(buf[:idx])
+                self._finish_part(part, form)
+                part = None
+                state = self._after_delimiter(buf[end:end + 2])
+                del buf[: end + 2]
+                if state == "done":
+                    return state, part
+
+    @staticmethod
+    def _after_delimiter(marker: bytes) -> str:
+        if marker == b"--":
+            return "done"
+        if marker == b"\r\n":
+            return "headers"
+        raise MultipartError("Malformed multipart boundary line")
+
+    @staticmethod
+    def _parse_part_headers(raw: bytes) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        lines: List[bytes] = raw.split(b"\r\n")
+        for line in lines:
+            name, sep, value = line.decode("utf-8", "replace").partition(":")
+            if not sep:
+                raise MultipartError("Malformed part header")
+            headers[name.strip().lower()] = value.strip()
+        return headers
+
+    @staticmethod
+    def _finish_part(part: _Part, form: FormData) -> None:
+        # ``parse`` may still hold ``part`` if a later step in the same call
+        # raises, so the body is detached to keep it from being released twice.
+        sink = part.detach()
+        if part.filename is None:
+            form.fields[part.name] = bytes(sink).decode("utf-8", "replace")
+            return
+        sink.seek(0)
+        previous = form.files.pop(part.name, None)
+        if previous is not None:
+            _release_spool(previous.file)
+        form.files[part.name] = UploadedFile(
+            name=part.name,
+            filename=part.filename,
+            content_type=part.content_type,
+            file=sink,
+        )
@@ -2,13 +2,49 @@
 
 from __future__ import annotations
 
+import collections
+import contextlib
 import csv
 import datetime as _dt
 import json
+import logging
 import os
+import re
+import threading
+import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterable, List, MutableMapping
+from typing import IO, Callable, Deque, Dict, Iterable, Iterator, List, MutableMapping, Optional, Sequence, Tuple, Union
+
+try:  # Optional accelerator: parses large CSVs in C with threaded block decoding.
+    import pyarrow as _pa
+    from pyarrow import csv as _pa_csv
+except ImportError:  # pragma: no cover - pyarrow is not a required dependency
+    _pa = _pa_csv = None
+
+try:  # Optional accelerator: C JSON encoder for the sign-in snapshots.
+    import orjson as _orjson
+except ImportError:  # pragma: no cover - orjson is not a required dependency
+    _orjson = None
+
+CSV_READ_BUFFER = 1024 * 1024
+
+# Streams at least this large are handed to pyarrow when it is installed;
+# below it, building an Arrow table costs more than the stdlib reader saves.
+ARROW_CSV_THRESHOLD = 1024 * 1024
+# Files opened from a path pay off sooner: pyarrow decodes their blocks in
+# parallel straight from the page cache instead of from an upload spool.
+ARROW_FILE_THRESHOLD = 64 * 1024
+
+# With a limit, the sign-in log is read backwards in blocks of this size
+# until enough lines are found, so startup cost does not grow with history.
+LOG_TAIL_BLOCK = 64 * 1024
+
+LOGGER = logging.getLogger("aba.enterprise.persistence")
+
+# ``fdatasync`` skips flushing inode metadata such as access times; platforms
+# without it (macOS, Windows) fall back to a full ``fsync``.
+_datasync = getattr(os, "fdatasync", os.fsync)
 
 
 @dataclass
@@ -48,16 +84,151 @@ class SignInRecord:
     action: str
 
 
-def _normalize_row(row: MutableMapping[str, str]) -> Dict[str, str]:
-    cleaned: Dict[str, str] = {}
-    for key, value in row.items():
-        if key is None:
-            continue
-        normalized_key = key.strip().lower()
-        if not normalized_key:
+CSVSource = Union[str, "os.PathLike[str]", IO[str]]
+
+
+def _arrow_threshold(source: CSVSource) -> int:
+    return ARROW_FILE_THRESHOLD if isinstance(source, (str, os.PathLike)) else ARROW_CSV_THRESHOLD
+
+
+@contextlib.contextmanager
+def _open_csv(source: CSVSource) -> Iterator[IO[str]]:
+    """Yield a text stream for ``source``, opening it first if it is a path.
+
+    Streams are yielded as-is and left open so uploads can be parsed straight
+    from the request body without a round-trip through a temporary file.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        # A 1 MiB buffer reads large rosters in a handful of syscalls rather
+        # than one per default 8 KiB block.
+        with open(source, newline="", encoding="utf-8", buffering=CSV_READ_BUFFER) as handle:
+            yield handle
+    else:
+        yield source
+
+
+def _json_line(value: object) -> bytes:
+    """Encode ``value`` as one line of UTF-8 JSON, using orjson when available."""
+    if _orjson is not None:
+        return _orjson.dumps(value) + b"\n"
+    return json.dumps(value, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def _parse_json(data: bytes) -> object:
+    """Decode JSON ``data``; both parsers raise ``ValueError`` subclasses."""
+    if _orjson is not None:
+        return _orjson.loads(data)
+    return json.loads(data)
+
+
+def _remaining_size(handle: IO[bytes]) -> int:
+    """Return the bytes left in a seekable ``handle``, or -1 if unknown."""
+    try:
+        position = handle.tell()
+        end = handle.seek(0, os.SEEK_END)
+        handle.seek(position)
+    except (AttributeError, OSError, ValueError):
+        return -1
+    return end - position
+
+
+def _decode_record(line: bytes) -> Optional[Dict[str, str]]:
+    """Decode one log line, or return ``None`` for a blank or unreadable one."""
+    if not line.strip():
+        return None
+    try:
+        item = _parse_json(line)
+    except ValueError:
+        # A crash mid-append can leave a torn final line.
+        return None
+    return item if isinstance(item, dict) else None
+
+
+def _tail_records(handle: IO[bytes], limit: int) -> List[Dict[str, str]]:
+    """Return the last ``limit`` records after the current position of ``handle``.
+
+    Lines are decoded while the log is read backwards, so blank or torn lines
+    do not count towards ``limit``.
+    """
+    start = handle.tell()
+    position = handle.seek(0, os.SEEK_END)
+    records: List[Dict[str, str]] = []
+    # The start of the earliest block read so far, which may be a cut line.
+    partial = b""
+    while position > start and len(records) < limit:
+        size = min(LOG_TAIL_BLOCK, position - start)
+        position -= size
+        handle.seek(position)
+        lines = (handle.read(size) + partial).split(b"\n")
+        partial = lines.pop(0) if position > start else b""
+        for line in reversed(lines):
+            record = _decode_record(line)
+            if record is not None:
+                records.append(record)
+                if len(records) == limit:
+                    break
+    records.reverse()
+    return records
+
+
+def _arrow_table(handle: IO[bytes]):
+    """Parse ``handle`` with pyarrow, or return ``None`` to use :mod:`csv` instead.
+
+    Every column is read as a string so identifiers such as ``007`` keep their
+    leading zeros, matching what :func:`csv.reader` would produce. The header
+    row is parsed by :mod:`csv` and given to pyarrow as the column names, so
+    the string types always apply and the keys match the stdlib path even
+    where the two parsers would read the header differently (a BOM, say).
+    """
+    start = handle.tell()
+    header = next(csv.reader([handle.readline().decode("utf-8", "replace")]), [])
+    handle.seek(start)
+    if not header:
+        # An empty list would make pyarrow take its names from the next row.
+        return None
+    try:
+        return _pa_csv.read_csv(
+            handle,
+            read_options=_pa_csv.ReadOptions(
+                use_threads=True, block_size=1 << 20, column_names=header, skip_rows=1
+            ),
+            convert_options=_pa_csv.ConvertOptions(
+                column_types={name: _pa.string() for name in header},
+                strings_can_be_null=False,
+            ),
+        )
+    except (_pa.ArrowInvalid, UnicodeDecodeError):
+        # Ragged rows and similar quirks are tolerated by the stdlib reader.
+        handle.seek(start)
+        return None
+
+
+def _padded_rows(reader: Iterator[List[str]], width: int) -> Iterator[List[str]]:
+    for row in reader:
+        if not row:
             continue
-        cleaned[normalized_key] = value.strip() if isinstance(value, str) else ""
-    return cleaned
+        if len(row) < width:
+            # Short rows read as empty trailing cells, as with DictReader.
+            row += [""] * (width - len(row))
+        yield row
+
+
+def _read_table(csvfile: IO[str], arrow_threshold: int) -> Tuple[List[str], Iterable[Sequence[str]]]:
+    """Return the normalised header names and the unstripped data rows.
+
+    Rows are positional sequences at least as wide as the header, so callers
+    resolve column indices once instead of building a dict per row. Inputs
+    of ``arrow_threshold`` bytes or more are parsed with pyarrow if present.
+    """
+    raw = getattr(csvfile, "buffer", None)
+    if _pa_csv is not None and raw is not None and _remaining_size(raw) >= arrow_threshold:
+        table = _arrow_table(raw)
+        if table is not None:
+            keys = [name.strip().lower() for name in table.column_names]
+            return keys, zip(*(column.to_pylist() for column in table.columns))
+    reader = csv.reader(csvfile)
+    keys = [name.strip().lower() for name in next(reader, [])]
+    return keys, _padded_rows(reader, len(keys))
 
 
 class CSVDataLoader:
@@ -67,100 +238,244 @@ class CSVDataLoader:
     REQUIRED_CLIENT_COLUMNS = {"id", "name", "site"}
     REQUIRED_SCHEDULE_COLUMNS = {"person_type", "id", "date", "start_time", "end_time", "site"}
 
-    def __init__(self, data_store: MutableMapping[str, object]):
+    def __init__(self, data_store: MutableMapping[str, object], lock: Optional[threading.Lock] = None):
         self._data = data_store
+        # Rows are parsed without holding the lock; only the final swap of the
+        # loaded collection into the shared store is guarded.
+        self._lock = lock or threading.Lock()
 
-    def load_people(self, file_path: str, category: str) -> None:
+    def load_people(self, source: CSVSource, category: str) -> None:
         if category not in {"staff", "clients"}:
             raise ValueError(f"Unsupported category: {category}")
         required = self.REQUIRED_STAFF_COLUMNS if category == "staff" else self.REQUIRED_CLIENT_COLUMNS
         records: Dict[str, Dict[str, str]] = {}
-        with open(file_path, newline="", encoding="utf-8") as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                cleaned = _normalize_row(row)
-                if not required.issubset(cleaned):
-                    # Skip incomplete rows; detailed validation is performed by
-                    # higher layers once a real database is adopted.
-                    continue
-                key = cleaned["id"]
-                records[key] = cleaned
-        self._data[category] = records
-
-    def load_schedule(self, file_path: str) -> None:
+        with _open_csv(source) as csvfile:
+            keys, rows = _read_table(csvfile, _arrow_threshold(source))
+            # Files missing a required column load nothing; detailed validation
+            # is performed by higher layers once a real database is adopted.
+            if required.issubset(keys):
+                columns = [(index, key) for index, key in enumerate(keys) if key]
+                for row in rows:
+                    cleaned = {key: row[index].strip() for index, key in columns}
+                    records[cleaned["id"]] = cleaned
+        with self._lock:
+            self._data[category] = records
+
+    def load_schedule(self, source: CSVSource) -> None:
         schedule: List[Dict[str, str]] = []
-        with open(file_path, newline="", encoding="utf-8") as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                cleaned = _normalize_row(row)
-                if not self.REQUIRED_SCHEDULE_COLUMNS.issubset(cleaned):
-                    continue
-                if not all(cleaned.get(field) for field in self.REQUIRED_SCHEDULE_COLUMNS):
-                    continue
-                person_type = cleaned.get("person_type", "")
-                if person_type not in {"staff", "client"}:
-                    continue
-                if not self._is_valid_date(cleaned["date"]):
-                    continue
-                if not self._is_valid_time(cleaned["start_time"]):
-                    continue
-                if not self._is_valid_time(cleaned["end_time"]):
-                    continue
-                schedule.append(
-                    {
-                        "person_type": person_type,
-                        "id": cleaned["id"],
-                        "date": cleaned["date"],
-                        "start_time": cleaned["start_time"],
-                        "end_time": cleaned["end_time"],
-                        "site": cleaned["site"],
-                    }
-                )
-        self._data["schedule"] = schedule
-
-    @staticmethod
-    def _is_valid_date(value: str) -> bool:
-        try:
-            _dt.datetime.strptime(value, "%Y-%m-%d")
-        except ValueError:
+        with _open_csv(source) as csvfile:
+            keys, rows = _read_table(csvfile, _arrow_threshold(source))
+            if self.REQUIRED_SCHEDULE_COLUMNS.issubset(keys):
+                index = {key: position for position, key in enumerate(keys)}
+                type_at, id_at, date_at = index["person_type"], index["id"], index["date"]
+                start_at, end_at, site_at = index["start_time"], index["end_time"], index["site"]
+                for row in rows:
+                    person_type = row[type_at].strip()
+                    person_id = row[id_at].strip()
+                    date = row[date_at].strip()
+                    start_time = row[start_at].strip()
+                    end_time = row[end_at].strip()
+                    site = row[site_at].strip()
+                    if not (person_id and date and start_time and end_time and site):
+                        continue
+                    if person_type not in {"staff", "client"}:
+                        continue
+                    if not self._is_valid_date(date):
+                        continue
+                    if not self._is_valid_time(start_time):
+                        continue
+                    if not self._is_valid_time(end_time):
+                        continue
+                    schedule.append(
+                        {
+                            "person_type": person_type,
+                            "id": person_id,
+                            "date": date,
+                            "start_time": start_time,
+                            "end_time": end_time,
+                            "site": site,
+                        }
+                    )
+        with self._lock:
+            self._data["schedule"] = schedule
+
+    # ``strptime`` re-parses its format string on every call; these accept the
+    # same inputs as ``%Y-%m-%d`` and ``%H:%M`` (unpadded fields included) and
+    # leave the calendar check to the ``date`` constructor.
+    _DATE_RE = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})", re.ASCII)
+    _TIME_RE = re.compile(r"(\d{1,2}):(\d{1,2})", re.ASCII)
+
+    @classmethod
+    def _is_valid_date(cls, value: str) -> bool:
+        match = cls._DATE_RE.fullmatch(value)
+        if match is None:
             return False
-        return True
-
-    @staticmethod
-    def _is_valid_time(value: str) -> bool:
         try:
-            _dt.datetime.strptime(value, "%H:%M")
+            _dt.date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
         except ValueError:
             return False
         return True
 
+    @classmethod
+    def _is_valid_time(cls, value: str) -> bool:
+        match = cls._TIME_RE.fullmatch(value)
+        return match is not None and int(match.group(1)) < 24 and int(match.group(2)) < 60
+
 
 class RuntimeSnapshotStore:
-    """Persist sign-in records to disk as JSON snapshots."""
+    """Persist sign-in records to disk as an append-only JSON Lines log.
+
+    Each sign-in adds one line to ``signins.jsonl``, so the cost of a save does
+    not grow with the history. Snapshots written as a single JSON document
+    (``signins.json``) by earlier versions are read while no log exists, and
+    are copied into the log before its first append; the old file is then
+    renamed to ``signins.json.migrated``.
+    """
 
     def __init__(self, runtime_dir: Path):
         self._runtime_dir = Path(runtime_dir)
         self._runtime_dir.mkdir(parents=True, exist_ok=True)
-        self._snapshot_path = self._runtime_dir / "signins.json"
+        self._snapshot_path = self._runtime_dir / "signins.jsonl"
+        self._legacy_path = self._runtime_dir / "signins.json"
 
-    def save(self, records: Iterable[Dict[str, str]]) -> None:
-        payload = [dict(record) for record in records]
-        with open(self._snapshot_path, "w", encoding="utf-8") as handle:
-            json.dump(payload, handle, indent=2)
+    def append(self, records: Iterable[Dict[str, str]]) -> None:
+        payload = b"".join(_json_line(dict(record)) for record in records)
+        if not payload:
+            return
+        if not self._snapshot_path.exists():
+            self._migrate_legacy()
+        with open(self._snapshot_path, "ab") as handle:
+            handle.write(payload)
+            handle.flush()
+            _datasync(handle.fileno())
 
-    def load(self) -> List[Dict[str, str]]:
+    def save(self, records: Iterable[Dict[str, str]]) -> None:
+        """Replace the whole log with ``records``, for example to compact it."""
+        payload = b"".join(_json_line(dict(record)) for record in records)
+        tmp_path = self._snapshot_path.with_name(self._snapshot_path.name + ".tmp")
+        with open(tmp_path, "wb") as handle:
+            handle.write(payload)
+            handle.flush()
+            _datasync(handle.fileno())
+        os.replace(tmp_path, self._snapshot_path)
+
+    def load(self, limit: Optional[int] = None) -> List[Dict[str, str]]:
+        """Return the logged records, or only the last ``limit`` of them.
+
+        With a limit, only the end of the log is read, and older lines are
+        neither read nor decoded.
+        """
         if not self._snapshot_path.exists():
+            records = self._load_legacy()
+            return records[-limit:] if limit else records
+        try:
+            with open(self._snapshot_path, "rb") as handle:
+                return self.read_log(handle, limit)
+        except OSError:
+            return []
+
+    @staticmethod
+    def read_log(handle: IO[bytes], limit: Optional[int] = None) -> List[Dict[str, str]]:
+        """Decode the records from an open JSON Lines log, as :meth:`load` does."""
+        if not limit:
+            records = (_decode_record(line) for line in handle)
+            return [record for record in records if record is not None]
+        if handle.seekable():
+            return _tail_records(handle, limit)
+        tail: Deque[Dict[str, str]] = collections.deque(maxlen=limit)
+        for line in handle:
+            record = _decode_record(line)
+            if record is not None:
+                tail.append(record)
+        return list(tail)
+
+    def _migrate_legacy(self) -> None:
+        """Start the log with the legacy snapshot so its history is kept."""
+        if not self._legacy_path.exists():
+            return
+        records = self._load_legacy()
+        if records:
+            self.save(records)
+        os.replace(self._legacy_path, self._legacy_path.with_name(self._legacy_path.name + ".migrated"))
+
+    def _load_legacy(self) -> List[Dict[str, str]]:
+        if not self._legacy_path.exists():
             return []
         try:
-            with open(self._snapshot_path, "r", encoding="utf-8") as handle:
-                data = json.load(handle)
-        except (OSError, json.JSONDecodeError):
+            with open(self._legacy_path, "rb") as handle:
+                data = _parse_json(handle.read())
+        except (OSError, ValueError):
             return []
         if isinstance(data, list):
             return [dict(item) for item in data if isinstance(item, dict)]
         return []
 
 
+class CoalescingSnapshotWriter:
+    """Batch snapshot appends onto a background thread.
+
+    ``append`` only queues the new records and wakes the writer, which waits
+    ``delay`` seconds before persisting so a burst of sign-ins costs a single
+    write and sync. The store is resolved through ``store_factory`` at write
+    time so callers may repoint the runtime directory between saves. A write
+    that fails with :class:`OSError` keeps its records queued, and the writer
+    retries on the next wake; a batch that fails for any other reason would
+    fail the same way every time, so it is logged and dropped instead.
+    """
+
+    def __init__(self, store_factory: Callable[[], RuntimeSnapshotStore], delay: float = 0.25) -> None:
+        self._store_factory = store_factory
+        self._delay = delay
+        self._dirty = threading.Event()
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending: List[Dict[str, str]] = []
+        self._thread: Optional[threading.Thread] = None
+
+    def append(self, records: Iterable[Dict[str, str]]) -> None:
+        with self._pending_lock:
+            self._pending.extend(records)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="snapshot-writer", daemon=True)
+                self._thread.start()
+        self._dirty.set()
+
+    def flush(self) -> None:
+        """Persist any pending records immediately on the calling thread."""
+        with self._write_lock:
+            with self._pending_lock:
+                records, self._pending = self._pending, []
+            if not records:
+                return
+            try:
+                self._store_factory().append(records)
+            except OSError:
+                with self._pending_lock:
+                    self._pending[:0] = records
+                raise
+            except Exception:
+                # Requeuing would block every later record behind this batch.
+                LOGGER.error("Dropped %d sign-in records that could not be written", len(records))
+                raise
+
+    def _run(self) -> None:
+        try:
+            while True:
+                self._dirty.wait()
+                time.sleep(self._delay)
+                self._dirty.clear()
+                try:
+                    self.flush()
+                except Exception:
+                    # Keep the thread alive; records from a failed disk write
+                    # stay queued for the next sign-in (or the exit-time flush).
+                    LOGGER.exception("Failed to append sign-in records to the runtime log")
+        finally:
+            # Let the next append start a fresh writer if this one ever exits.
+            with self._pending_lock:
+                self._thread = None
+
+
 class SettingsStore:
     """Persist runtime configuration outside of source control."""
 
@@ -187,8 +502,12 @@ class SettingsStore:
 
     def save(self, settings: Dict[str, str]) -> None:
         payload = {"teams_webhook_url": settings.get("teams_webhook_url", "")}
-        with open(self._path, "w", encoding="utf-8") as handle:
+        # Write a sibling file and rename it into place so a reader (or a crash
+        # mid-write) sees either the old settings or the new ones, never half.
+        tmp_path = self._path.with_name(self._path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as handle:
             json.dump(payload, handle, indent=2)
+        os.replace(tmp_path, self._path)
 
 
 class AuditLogger:
@@ -5,12 +5,13 @@ from __future__ import annotations
 import datetime as _dt
 import json
 import logging
-from typing import Dict, List, MutableMapping, Optional, Tuple
+import threading
+from typing import Dict, List, MutableMapping, Optional, Sequence, Tuple, Union
 import urllib.error
 import urllib.request
 
 from .config import AppConfig
-from .persistence import AuditLogger, RuntimeSnapshotStore
+from .persistence import AuditLogger, CoalescingSnapshotWriter, RuntimeSnapshotStore
 
 LOGGER = logging.getLogger("aba.enterprise.services")
 
@@ -20,19 +21,25 @@ def _utcnow_iso() -> str:
 
 
 class SignInService:
-    """Encapsulate sign-in/out rules and auditing."""
+    """Encapsulate sign-in/out rules and auditing.
+
+    Recorded actions are appended to ``snapshot_store``; pass ``None`` to keep
+    them in memory only.
+    """
 
     def __init__(
         self,
         data_store: MutableMapping[str, object],
-        snapshot_store: RuntimeSnapshotStore,
+        snapshot_store: Optional[Union[RuntimeSnapshotStore, CoalescingSnapshotWriter]],
         audit_logger: AuditLogger,
         config: AppConfig,
+        lock: Optional[threading.Lock] = None,
     ) -> None:
         self._data = data_store
         self._snapshot_store = snapshot_store
         self._audit_logger = audit_logger
         self._config = config
+        self._lock = lock or threading.Lock()
 
     def record_action(self, *, person_type: str, person_id: str, action: str, site: str) -> Dict[str, str]:
         if person_type not in {"staff", "client"}:
@@ -53,8 +60,10 @@ class SignInService:
             "timestamp": timestamp,
             "action": action,
         }
-        self._data.setdefault("signins", []).append(entry)
-        self._snapshot_store.save(self._data["signins"])
+        with self._lock:
+            self._data.setdefault("signins", []).append(entry)
+            if self._snapshot_store is not None:
+                self._snapshot_store.append((entry,))
         if self._config.audit_log_enabled:
             self._audit_logger.record(
                 {
@@ -79,63 +88,126 @@ class SignInService:
 class ReportingService:
     """Compute schedule adherence and emergency roll-call data."""
 
-    def __init__(self, data_store: MutableMapping[str, object]):
+    def __init__(self, data_store: MutableMapping[str, object], lock: Optional[threading.Lock] = None):
         self._data = data_store
+        # Guards reads of the shared sign-in collection, which may be a deque
+        # that cannot be iterated while another thread appends to it.
+        self._lock = lock or threading.Lock()
+        # Index of the latest record per person, caught up incrementally with
+        # the sign-in collection it was built from.
+        self._actions: Dict[Tuple[str, str], Dict[str, str]] = {}
+        self._actions_source: Optional[Sequence[Dict[str, str]]] = None
+        self._actions_last: Optional[Dict[str, str]] = None
+        self._actions_lock = threading.Lock()
+        # Schedule entries grouped by date, rebuilt when the schedule changes.
+        self._schedule_by_date: Dict[str, List[Dict[str, str]]] = {}
+        self._schedule_source: Optional[List[Dict[str, str]]] = None
+        self._schedule_size = 0
+        self._schedule_lock = threading.Lock()
+        # (date, source objects, sizes, views) from the last build_daily_views.
+        self._views: Optional[Tuple[str, tuple, tuple, Tuple[List[Dict[str, str]], Dict[str, object]]]] = None
 
     def last_actions(self) -> Dict[Tuple[str, str], Dict[str, str]]:
-        actions: Dict[Tuple[str, str], Dict[str, str]] = {}
-        for record in self._data.get("signins", []):
-            key = (record.get("person_type"), record.get("id"))
-            actions[key] = record
-        return actions
+        """Return the most recent sign-in record per ``(person_type, id)``.
 
-    def build_schedule_matrix(self, date: Optional[str] = None) -> List[Dict[str, str]]:
-        today = date or _dt.date.today().isoformat()
-        actions = self.last_actions()
-        rows: List[Dict[str, str]] = []
-        for schedule in self._data.get("schedule", []):
-            if schedule.get("date") != today:
-                continue
-            key = (schedule.get("person_type"), schedule.get("id"))
-            person_store = self._data["staff" if schedule.get("person_type") == "staff" else "clients"]
-            person = person_store.get(schedule.get("id"), {})
-            entry = {
-                "person_type": schedule.get("person_type", "").title(),
-                "name": person.get("name", schedule.get("id", "")),
-                "start_time": schedule.get("start_time", ""),
-                "end_time": schedule.get("end_time", ""),
-                "site": schedule.get("site", ""),
-                "status": "Absent",
-                "sign_time": "",
-            }
-            action = actions.get(key)
-            if action and action.get("action") == "sign_in":
-                entry["status"] = "Present"
-                entry["sign_time"] = action.get("timestamp", "")
-            rows.append(entry)
-        return rows
+        Only records appended since the previous call are scanned, found by
+        walking back from the newest record to the last one indexed. The index
+        is rebuilt if the sign-in collection is replaced or that record is no
+        longer in it. The returned mapping is shared and must not be modified.
+        """
+        records = self._data.get("signins", [])
+        with self._actions_lock:
+            if records is not self._actions_source:
+                self._actions = {}
+                self._actions_source = records
+                self._actions_last = None
+            last = self._actions_last
+            fresh: List[Dict[str, str]] = []
+            with self._lock:
+                for record in reversed(records):
+                    if record is last:
+                        break
+                    fresh.append(record)
+                else:
+                    if last is not None:
+                        self._actions = {}
+                        self._actions_last = None
+            actions = self._actions
+            for record in reversed(fresh):
+                actions[(record.get("person_type"), record.get("id"))] = record
+            if fresh:
+                self._actions_last = fresh[0]
+            return actions
 
-    def build_emergency_status(self, date: Optional[str] = None) -> Dict[str, object]:
+    def schedule_for(self, date: str) -> List[Dict[str, str]]:
+        """Return the schedule entries for ``date`` without scanning the schedule.
+
+        The by-date index is built on first use and rebuilt whenever the
+        schedule list is replaced (as every CSV load does) or changes length.
+        """
+        schedule = self._data.get("schedule", [])
+        with self._schedule_lock:
+            if schedule is not self._schedule_source or len(schedule) != self._schedule_size:
+                index: Dict[str, List[Dict[str, str]]] = {}
+                for entry in schedule:
+                    index.setdefault(entry.get("date"), []).append(entry)
+                self._schedule_by_date = index
+                self._schedule_source = schedule
+                self._schedule_size = len(schedule)
+            return self._schedule_by_date.get(date, [])
+
+    def build_daily_views(self, date: Optional[str] = None) -> Tuple[List[Dict[str, str]], Dict[str, object]]:
+        """Return the schedule matrix and emergency status for ``date`` together.
+
+        Both views come from one pass over the day's schedule. The result is
+        reused until the date, schedule, rosters or sign-ins change, so callers
+        must treat it as read-only.
+        """
         today = date or _dt.date.today().isoformat()
+        signins = self._data.get("signins", [])
+        staff = self._data.get("staff", {})
+        clients = self._data.get("clients", {})
+        schedule = self._data.get("schedule", [])
+        sources = (schedule, staff, clients, signins, signins[-1] if signins else None)
+        sizes = (len(schedule), len(staff), len(clients), len(signins))
+        cached = self._views
+        if (
+            cached is not None
+            and cached[0] == today
+            and cached[2] == sizes
+            and all(old is new for old, new in zip(cached[1], sources))
+        ):
+            return cached[3]
+
         actions = self.last_actions()
-        present = []
-        missing = []
-        for schedule in self._data.get("schedule", []):
-            if schedule.get("date") != today:
-                continue
-            key = (schedule.get("person_type"), schedule.get("id"))
-            person_store = self._data["staff" if schedule.get("person_type") == "staff" else "clients"]
-            person = person_store.get(schedule.get("id"), {})
-            name = person.get("name", schedule.get("id", ""))
-            site = schedule.get("site", "")
-            contact_name = person.get("contact_name", "")
-            contact_phone = person.get("contact_phone", "")
-            action = actions.get(key)
-            if action and action.get("action") == "sign_in":
+        rows: List[Dict[str, str]] = []
+        present: List[Dict[str, str]] = []
+        missing: List[Dict[str, str]] = []
+        for entry in self.schedule_for(today):
+            person_type = entry.get("person_type", "")
+            person_id = entry.get("id", "")
+            person = (staff if person_type == "staff" else clients).get(person_id, {})
+            name = person.get("name", person_id)
+            site = entry.get("site", "")
+            label = person_type.title()
+            action = actions.get((person_type, person_id))
+            signed_in = action is not None and action.get("action") == "sign_in"
+            rows.append(
+                {
+                    "person_type": label,
+                    "name": name,
+                    "start_time": entry.get("start_time", ""),
+                    "end_time": entry.get("end_time", ""),
+                    "site": site,
+                    "status": "Present" if signed_in else "Absent",
+                    "sign_time": action.get("timestamp", "") if signed_in else "",
+                }
+            )
+            if signed_in:
                 present.append(
                     {
-                        "person_type": schedule.get("person_type", "").title(),
-                        "person_id": schedule.get("id", ""),
+                        "person_type": label,
+                        "person_id": person_id,
                         "name": name,
                         "site": action.get("site", site),
                         "timestamp": action.get("timestamp", ""),
@@ -144,15 +216,23 @@ class ReportingService:
             else:
                 missing.append(
                     {
-                        "person_type": schedule.get("person_type", "").title(),
-                        "person_id": schedule.get("id", ""),
+                        "person_type": label,
+                        "person_id": person_id,
                         "name": name,
                         "site": site,
-                        "contact_name": contact_name,
-                        "contact_phone": contact_phone,
+                        "contact_name": person.get("contact_name", ""),
+                        "contact_phone": person.get("contact_phone", ""),
                     }
                 )
-        return {"date": today, "present": present, "missing": missing}
+        views = (rows, {"date": today, "present": present, "missing": missing})
+        self._views = (today, sources, sizes, views)
+        return views
+
+    def build_schedule_matrix(self, date: Optional[str] = None) -> List[Dict[str, str]]:
+        return self.build_daily_views(date)[0]
+
+    def build_emergency_status(self, date: Optional[str] = None) -> Dict[str, object]:
+        return self.build_daily_views(date)[1]
 
 
 class EmergencyNotificationService:
@@ -32,44 +32,68 @@ For a production system you would likely replace these structures
 with a proper database and authentication system.
 """
 
+import atexit
+import collections
+import concurrent.futures
 import csv
 import datetime
+import functools
+import gzip
+import hashlib
 import html
 import io
+import itertools
+import logging
+import mimetypes
 import os
+import re
+import threading
+import time
 from http import HTTPStatus
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import parse_qs
-import cgi
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qsl
 
 from aba_enterprise import (
     AppConfig,
     AuditLogger,
+    CoalescingSnapshotWriter,
     CSVDataLoader,
     EmergencyNotificationService,
+    MultipartError,
+    MultipartParser,
     ReportingService,
     RuntimeSnapshotStore,
     SettingsStore,
     SignInService,
     configure_logging,
     load_app_config,
+    parse_options_header,
 )
 
 # Base directory of this script
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Files under /static/ are served from here and nowhere else.
+STATIC_DIR = os.path.realpath(os.path.join(BASE_DIR, 'static'))
 
 # Directory where runtime files (snapshots) are stored
 APP_CONFIG: AppConfig = load_app_config(BASE_DIR)
 configure_logging(APP_CONFIG)
 RUNTIME_DIR = str(APP_CONFIG.runtime_dir)
 os.makedirs(RUNTIME_DIR, exist_ok=True)
+# When False, new sign-ins are kept in memory only and not appended to the
+# log under RUNTIME_DIR (tests that do not exercise persistence turn it off).
+PERSIST_RUNTIME = True
+
+# Only the most recent sign-ins are kept in memory; the full history stays in
+# the append-only log under RUNTIME_DIR.
+SIGNIN_MEMORY_LIMIT = 10000
 
 # Global in‑memory storage
 DATA = {
     'staff': {},    # id -> {id, name, email, phone, site, contact_name, contact_phone}
     'clients': {},  # id -> {id, name, contact_name, contact_phone, site}
     'schedule': [], # list of {person_type, id, date, start_time, end_time, site}
-    'signins': []   # list of {person_type, id, name, site, timestamp, action}
+    'signins': collections.deque(maxlen=SIGNIN_MEMORY_LIMIT),  # {person_type, id, name, site, timestamp, action}
 }
 
 # Runtime settings such as configured webhooks
@@ -77,8 +101,26 @@ SETTINGS = {
     'teams_webhook_url': ''
 }
 
-DATA_LOADER = CSVDataLoader(DATA)
-REPORTING_SERVICE = ReportingService(DATA)
+# Requests are served on separate threads; writers to DATA and SETTINGS take
+# this lock so a CSV reload or settings save cannot interleave with a sign-in.
+STATE_LOCK = threading.Lock()
+# Serialises settings writes, which share a temp file, without holding
+# STATE_LOCK across disk I/O.
+_SETTINGS_WRITE_LOCK = threading.Lock()
+
+DATA_LOADER = CSVDataLoader(DATA, STATE_LOCK)
+REPORTING_SERVICE = ReportingService(DATA, STATE_LOCK)
+
+LOGGER = logging.getLogger("aba.app")
+
+# Outbound Teams webhooks run on a background worker so the request thread can
+# answer immediately instead of waiting on the HTTPS round trip to Microsoft.
+# A single worker keeps deliveries to a channel in the order they were queued.
+_NOTIFY_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='teams')
+atexit.register(_NOTIFY_POOL.shutdown, wait=False)
+# Latest status waiting to be sent, per webhook; see dispatch_teams_notification.
+_PENDING_NOTIFICATIONS = {}
+_PENDING_LOCK = threading.Lock()
 
 
 FIRE_DRILL_REASON_OPTIONS = [
@@ -90,6 +132,403 @@ FIRE_DRILL_REASON_OPTIONS = [
     "Other",
 ]
 
+# ``datetime-local`` inputs submit ``YYYY-MM-DDTHH:MM`` (optionally with
+# seconds); anything else is rejected before reaching ``fromisoformat``.
+_DRILL_DATETIME_RE = re.compile(r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}(?::\d{2})?')
+
+_HTTPS_URL_RE = re.compile(r'\Ahttps://', re.IGNORECASE)
+
+
+# The HTML shell is split around the title and body and encoded once, so a
+# page costs one join of bytes fragments instead of a full-document f-string
+# followed by a UTF-8 encode of the whole thing.
+_PAGE_HEAD = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="UTF-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1.0">
+  <title>""".encode('utf-8')
+_PAGE_MID = """</title>
+  <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.1/dist/css/bootstrap.min.css">
+</head>
+<body class="bg-light">
+<nav class="navbar navbar-expand-lg navbar-dark bg-primary mb-4">
+  <div class="container-fluid">
+    <a class="navbar-brand" href="/">ABA Sign In</a>
+    <button class="navbar-toggler" type="button" data-bs-toggle="collapse" data-bs-target="#navbarNav" aria-controls="navbarNav" aria-expanded="false" aria-label="Toggle navigation">
+      <span class="navbar-toggler-icon"></span>
+    </button>
+    <div class="collapse navbar-collapse" id="navbarNav">
+      <ul class="navbar-nav">
+        <li class="nav-item"><a class="nav-link" href="/">Home</a></li>
+        <li class="nav-item"><a class="nav-link" href="/admin">Admin</a></li>
+        <li class="nav-item"><a class="nav-link" href="/emergency">Emergency</a></li>
+        <li class="nav-item"><a class="nav-link" href="/load_data">Load Data</a></li>
+      </ul>
+    </div>
+  </div>
+</nav>
+<div class="container">
+  """.encode('utf-8')
+_PAGE_TAIL = """
+</div>
+</body>
+</html>
+""".encode('utf-8')
+
+
+@functools.lru_cache(maxsize=64)
+def _title_bytes(title: str) -> bytes:
+    return title.encode('utf-8')
+
+
+def render_page(title: str, body) -> bytes:
+    """Wrap ``body`` in the shared HTML shell and return it UTF-8 encoded.
+
+    ``body`` may be a ``str`` or already-encoded ``bytes``.
+    """
+    if not isinstance(body, bytes):
+        body = body.encode('utf-8')
+    return b''.join((_PAGE_HEAD, _title_bytes(title), _PAGE_MID, body, _PAGE_TAIL))
+
+# The reason dropdown is identical for every missing person, so render it once.
+_REASON_OPTIONS_HTML = '<option value="">-- Select reason --</option>' + ''.join(
+    f'<option value="{html.escape(reason)}">{html.escape(reason)}</option>'
+    for reason in FIRE_DRILL_REASON_OPTIONS
+)
+
+
+# person_type -> (roster dict, size, rendered <option> list). Every CSV load
+# swaps in a new roster dict, which invalidates the entry.
+_OPTIONS_CACHE = {}
+
+
+def _person_options(person_type: str, people: dict) -> str:
+    """Return escaped ``<option>`` tags for ``people``, rendered once per roster."""
+    cached = _OPTIONS_CACHE.get(person_type)
+    if cached is not None and cached[0] is people and cached[1] == len(people):
+        return cached[2]
+    escape = html.escape
+    options = ''.join([
+        f'<option value="{person_type}|{escape(pid)}">{escape(rec.get("name", ""))}</option>'
+        for pid, rec in list(people.items())
+    ])
+    _OPTIONS_CACHE[person_type] = (people, len(people), options)
+    return options
+
+
+# Bodies that only vary in a field or two are formatted from templates built at
+# import time.
+_HOME_BODY = """
+<div class="row">
+  <div class="col-md-6">
+    <h2>Staff Sign In/Out</h2>
+    <form method="post" action="/sign_action">
+      <div class="mb-3">
+        <label for="staff_select" class="form-label">Select staff member</label>
+        <select class="form-select" id="staff_select" name="person" required>
+          <option value="">-- Choose staff --</option>
+          {staff_options}
+        </select>
+      </div>
+      <div class="mb-3">
+        <label class="form-label">Action</label><br>
+        <div class="form-check form-check-inline">
+          <input class="form-check-input" type="radio" name="action" id="staff_in" value="sign_in" checked>
+          <label class="form-check-label" for="staff_in">Sign In</label>
+        </div>
+        <div class="form-check form-check-inline">
+          <input class="form-check-input" type="radio" name="action" id="staff_out" value="sign_out">
+          <label class="form-check-label" for="staff_out">Sign Out</label>
+        </div>
+      </div>
+      <div class="mb-3">
+        <label for="staff_site" class="form-label">Site</label>
+        <input type="text" class="form-control" id="staff_site" name="site" placeholder="e.g. Fort Wayne" required>
+      </div>
+      <button type="submit" class="btn btn-primary">Submit</button>
+    </form>
+  </div>
+  <div class="col-md-6">
+    <h2>Client Sign In/Out</h2>
+    <form method="post" action="/sign_action">
+      <div class="mb-3">
+        <label for="client_select" class="form-label">Select client</label>
+        <select class="form-select" id="client_select" name="person" required>
+          <option value="">-- Choose client --</option>
+          {client_options}
+        </select>
+      </div>
+      <div class="mb-3">
+        <label class="form-label">Action</label><br>
+        <div class="form-check form-check-inline">
+          <input class="form-check-input" type="radio" name="action" id="client_in" value="sign_in" checked>
+          <label class="form-check-label" for="client_in">Sign In</label>
+        </div>
+        <div class="form-check form-check-inline">
+          <input class="form-check-input" type="radio" name="action" id="client_out" value="sign_out">
+          <label class="form-check-label" for="client_out">Sign Out</label>
+        </div>
+      </div>
+      <div class="mb-3">
+        <label for="client_site" class="form-label">Site</label>
+        <input type="text" class="form-control" id="client_site" name="site" placeholder="e.g. Fort Wayne" required>
+      </div>
+      <button type="submit" class="btn btn-primary">Submit</button>
+    </form>
+  </div>
+</div>
+""".format
+# (staff options, client options, encoded page). The option strings come from
+# _person_options, so an identity check tells whether a roster was reloaded.
+_HOME_PAGE_CACHE = [(None, None, b'')]
+
+_LOAD_DATA_BODY = """
+<h2>Load Data</h2>
+<p>Use this page to upload CSV files for staff, clients, and schedules. The server will overwrite existing data in memory.</p>
+<div class="row">
+  <div class="col-md-4">
+    <h4>Upload Staff CSV</h4>
+    <form method="post" action="/upload_csv" enctype="multipart/form-data">
+      <input type="hidden" name="category" value="staff">
+      <div class="mb-3">
+        <input class="form-control" type="file" name="file" accept=".csv" required>
+      </div>
+      <button type="submit" class="btn btn-primary">Upload Staff</button>
+    </form>
+  </div>
+  <div class="col-md-4">
+    <h4>Upload Clients CSV</h4>
+    <form method="post" action="/upload_csv" enctype="multipart/form-data">
+      <input type="hidden" name="category" value="clients">
+      <div class="mb-3">
+        <input class="form-control" type="file" name="file" accept=".csv" required>
+      </div>
+      <button type="submit" class="btn btn-primary">Upload Clients</button>
+    </form>
+  </div>
+  <div class="col-md-4">
+    <h4>Upload Schedule CSV</h4>
+    <form method="post" action="/upload_csv" enctype="multipart/form-data">
+      <input type="hidden" name="category" value="schedule">
+      <div class="mb-3">
+        <input class="form-control" type="file" name="file" accept=".csv" required>
+      </div>
+      <button type="submit" class="btn btn-primary">Upload Schedule</button>
+    </form>
+  </div>
+</div>
+<hr>
+<div class="row">
+  <div class="col-md-6">
+    <h4>Microsoft Teams Emergency Notifications {webhook_hint}</h4>
+    <p>Provide an incoming webhook URL from your Microsoft Teams channel to enable one-click emergency notifications.</p>
+    <form method="post" action="/configure_teams">
+      <div class="mb-3">
+        <label for="teams_webhook" class="form-label">Teams Webhook URL</label>
+        <input type="url" class="form-control" id="teams_webhook" name="webhook" placeholder="https://..." value="{webhook_url}" required>
+      </div>
+      <button type="submit" class="btn btn-primary">Save Webhook</button>
+    </form>
+    <p class="mt-2 text-muted">The URL is stored on this server only and used when sending an emergency notification.</p>
+  </div>
+</div>
+""".format
+
+_WEBHOOK_BADGES = {
+    True: '<span class="badge bg-success">Configured</span>',
+    False: '<span class="badge bg-secondary">Not Configured</span>',
+}
+
+
+@functools.lru_cache(maxsize=8)
+def _load_data_page(webhook_url: str) -> bytes:
+    """Render the Load Data page; it only varies with the configured webhook."""
+    body = _LOAD_DATA_BODY(
+        webhook_hint=_WEBHOOK_BADGES[bool(webhook_url)],
+        webhook_url=html.escape(webhook_url),
+    )
+    return _prerendered(render_page('Load Data', body))
+
+
+_UPLOAD_ERROR_BODY = '<p class="text-danger">Error processing CSV: {error}</p>'.format
+_UPLOAD_TOO_LARGE_BODY = (
+    '<p class="text-danger">The uploaded file is larger than the {limit} MB limit.</p>'
+    '<a href="/load_data" class="btn btn-secondary">Back</a>'
+).format
+_UPLOAD_SUCCESS_BODY = (
+    '<div class="alert alert-success" role="alert">Successfully loaded {category} data.</div>'
+    '<a href="/load_data" class="btn btn-primary">Back to Load Data</a>'
+).format
+
+# Fully static responses are rendered and encoded once.
+_INVALID_FORM_PAGE = render_page('Error', '<p class="text-danger">Invalid form submission.</p>')
+_INVALID_PERSON_PAGE = render_page('Error', '<p class="text-danger">Invalid person selected.</p>')
+_INVALID_UPLOAD_PAGE = render_page('Error', '<p class="text-danger">Invalid upload request.</p>')
+_TEAMS_NO_WEBHOOK_PAGE = render_page(
+    'Teams Configuration Error',
+    '<p class="text-danger">No webhook URL provided.</p><a href="/load_data" class="btn btn-secondary">Back</a>',
+)
+_TEAMS_NOT_HTTPS_PAGE = render_page(
+    'Teams Configuration Error',
+    '<p class="text-danger">Webhook URLs must start with https://</p><a href="/load_data" class="btn btn-secondary">Back</a>',
+)
+_TEAMS_SAVED_PAGE = render_page(
+    'Teams Configuration Saved',
+    '<div class="alert alert-success" role="alert">Microsoft Teams webhook saved.</div><a href="/load_data" class="btn btn-primary">Back to Load Data</a>',
+)
+_NOTIFY_NO_WEBHOOK_PAGE = render_page(
+    'Notification Error',
+    '<p class="text-danger">No Microsoft Teams webhook configured.</p><a href="/emergency" class="btn btn-secondary">Back</a>',
+)
+_NOTIFY_QUEUED_PAGE = render_page(
+    'Notification Queued',
+    '<div class="alert alert-success" role="alert">Emergency notification queued for Microsoft Teams.</div>'
+    '<a href="/emergency" class="btn btn-primary">Back to Emergency</a>',
+)
+_FIREDRILL_ERROR_PAGES = {
+    key: render_page(
+        'Fire Drill Report Error',
+        f'<p class="text-danger">{message}</p><a href="/firedrill_report" class="btn btn-secondary">Back</a>',
+    )
+    for key, message in (
+        ('too_many_fields', 'Too many fields submitted.'),
+        ('missing_fields', 'Fire drill date/time and location are required.'),
+        ('invalid_datetime', 'Invalid date/time provided.'),
+        ('missing_reason', 'Please select a reason for each individual who was not accounted for.'),
+    )
+}
+_UPLOAD_SUCCESS_PAGES = {
+    category: render_page('Upload Successful', _UPLOAD_SUCCESS_BODY(category=category))
+    for category in ('staff', 'clients', 'schedule')
+}
+
+
+# Resolved file path -> (content, content type, ETag). Static assets do not
+# change while the server runs, so each one is read and hashed on first request
+# only. Keying on the resolved path bounds the cache by the files in STATIC_DIR
+# however many spellings (``./``, ``//``, ``x/..``) a URL uses for them.
+_STATIC_CACHE = {}
+
+
+def _load_static(path: str):
+    """Return the cached ``(content, content_type, etag)`` for ``path`` or ``None``."""
+    # Extra leading slashes would make join() discard STATIC_DIR altogether.
+    file_path = os.path.realpath(os.path.join(STATIC_DIR, path[len('/static/'):].lstrip('/')))
+    # Refuse anything that resolves outside STATIC_DIR, e.g. ``/static/../app.py``.
+    if os.path.commonpath((file_path, STATIC_DIR)) != STATIC_DIR:
+        return None
+    cached = _STATIC_CACHE.get(file_path)
+    if cached is not None:
+        return cached
+    if not os.path.isfile(file_path):
+        return None
+    with open(file_path, 'rb') as f:
+        content = f.read()
+    content_type = mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+    etag = f'"{hashlib.sha1(content).hexdigest()}"'
+    cached = _STATIC_CACHE[file_path] = (_prerendered(content), content_type, etag)
+    return cached
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == '*':
+        return True
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        # Weak comparison: a ``W/`` prefix does not prevent a match.
+        if (tag[2:] if tag.startswith('W/') else tag) == etag:
+            return True
+    return False
+
+
+# Escaped ``<tr>`` fragments for the roster tables, keyed on the raw cell values
+# so a row is only re-escaped when something about that person changes.
+_ROW_CACHE = {}
+_ROW_CACHE_LIMIT = 4096
+
+
+def _cached_row(cells: tuple) -> str:
+    row = _ROW_CACHE.get(cells)
+    if row is None:
+        if len(_ROW_CACHE) >= _ROW_CACHE_LIMIT:
+            _ROW_CACHE.clear()
+        row = '<tr>' + ''.join(f'<td>{html.escape(value)}</td>' for value in cells) + '</tr>'
+        _ROW_CACHE[cells] = row
+    return row
+
+
+# Responses smaller than this gain little from compression.
+_GZIP_MIN_SIZE = 512
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """Return True when an ``Accept-Encoding`` header allows gzip."""
+    for item in accept_encoding.split(','):
+        coding, _, params = item.partition(';')
+        if coding.strip().lower() != 'gzip':
+            continue
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+# id(page) -> [page, gzip form or None] for pages that are sent over and over.
+# Keying on the id means a lookup never hashes a response body, and only pages
+# passed to _prerendered are kept, so dynamic responses (which may hold contact
+# details) are compressed directly and never pinned in memory.
+_GZIP_CACHE = collections.OrderedDict()
+_GZIP_CACHE_SIZE = 64
+_GZIP_LOCK = threading.Lock()
+
+
+def _prerendered(page: bytes) -> bytes:
+    """Mark ``page`` as reused between responses so its gzip form is cached."""
+    with _GZIP_LOCK:
+        # The entry holds a reference to the page, so its id cannot be reused.
+        _GZIP_CACHE.setdefault(id(page), [page, None])
+        _GZIP_CACHE.move_to_end(id(page))
+        while len(_GZIP_CACHE) > _GZIP_CACHE_SIZE:
+            _GZIP_CACHE.popitem(last=False)
+    return page
+
+
+def _gzip_bytes(content: bytes) -> bytes:
+    with _GZIP_LOCK:
+        entry = _GZIP_CACHE.get(id(content))
+        if entry is not None:
+            _GZIP_CACHE.move_to_end(id(content))
+            if entry[1] is not None:
+                return entry[1]
+    # Level 1 keeps CPU cost low; HTML still shrinks several-fold.
+    compressed = gzip.compress(content, compresslevel=1, mtime=0)
+    if entry is not None:
+        entry[1] = compressed
+    return compressed
+
+
+for _page in (
+    _INVALID_FORM_PAGE,
+    _INVALID_PERSON_PAGE,
+    _INVALID_UPLOAD_PAGE,
+    _TEAMS_NO_WEBHOOK_PAGE,
+    _TEAMS_NOT_HTTPS_PAGE,
+    _TEAMS_SAVED_PAGE,
+    _NOTIFY_NO_WEBHOOK_PAGE,
+    _NOTIFY_QUEUED_PAGE,
+    *_FIREDRILL_ERROR_PAGES.values(),
+    *_UPLOAD_SUCCESS_PAGES.values(),
+):
+    _prerendered(_page)
+del _page
+
 
 def _snapshot_store() -> RuntimeSnapshotStore:
     return RuntimeSnapshotStore(RUNTIME_DIR)
@@ -99,25 +538,32 @@ def _settings_store() -> SettingsStore:
     return SettingsStore(RUNTIME_DIR)
 
 
+# Sign-ins mark the snapshot dirty; the writer persists bursts in one write.
+SNAPSHOT_WRITER = CoalescingSnapshotWriter(_snapshot_store)
+
+
 def _audit_logger() -> AuditLogger:
     return AuditLogger(RUNTIME_DIR)
 
 
 def _sign_in_service() -> SignInService:
-    return SignInService(DATA, _snapshot_store(), _audit_logger(), APP_CONFIG)
+    snapshot_writer = SNAPSHOT_WRITER if PERSIST_RUNTIME else None
+    return SignInService(DATA, snapshot_writer, _audit_logger(), APP_CONFIG, STATE_LOCK)
 
 
 def _notification_service() -> EmergencyNotificationService:
     return EmergencyNotificationService(APP_CONFIG)
 
 
-def load_csv(file_path: str, category: str) -> None:
+def load_csv(file_path, category: str) -> None:
     """Load staff or client data from a CSV file.
 
     Parameters
     ----------
-    file_path : str
-        Path to the CSV file.
+    file_path : str or text file object
+        Path to the CSV file, or an open text stream (opened with
+        ``newline=''``) such as an uploaded file wrapped in
+        :class:`io.TextIOWrapper`.
     category : str
         Either 'staff' or 'clients'. Determines how the records are stored.
 
@@ -132,8 +578,8 @@ def load_csv(file_path: str, category: str) -> None:
     DATA_LOADER.load_people(file_path, category)
 
 
-def load_schedule_csv(file_path: str) -> None:
-    """Load schedule data from a CSV file.
+def load_schedule_csv(file_path) -> None:
+    """Load schedule data from a CSV file path or open text stream.
 
     The schedule CSV should have columns:
         person_type,id,date,start_time,end_time,site
@@ -151,24 +597,51 @@ def load_schedule_csv(file_path: str) -> None:
 
 
 def save_runtime_state() -> None:
-    """Save the current sign‑in records to disk as JSON.
+    """Make sure every sign‑in recorded so far is in the log on disk.
 
     This allows the state to be preserved across server restarts. Only
     sign‑in records are stored in the runtime snapshot because staff,
-    client, and schedule data are typically loaded from CSV files.
+    client, and schedule data are typically loaded from CSV files. The log
+    is append-only and holds the full history, whereas memory only keeps the
+    last ``SIGNIN_MEMORY_LIMIT`` records, so saving writes out the queued
+    appends rather than rewriting the log from memory.
     """
-    _snapshot_store().save(DATA['signins'])
+    flush_runtime_state()
+
+
+def flush_runtime_state() -> None:
+    """Write any sign‑in snapshot still waiting on the background writer."""
+    SNAPSHOT_WRITER.flush()
+
+
+atexit.register(flush_runtime_state)
 
 
 def load_runtime_state() -> None:
-    """Load sign‑in records from disk if they exist."""
-    DATA['signins'] = _snapshot_store().load()
+    """Load the most recent sign‑in records from disk if they exist."""
+    _replace_signins(_snapshot_store().load(limit=SIGNIN_MEMORY_LIMIT))
+
+
+def _load_runtime_from(handle) -> None:
+    """Load the most recent sign‑in records from an open JSON Lines log."""
+    _replace_signins(RuntimeSnapshotStore.read_log(handle, limit=SIGNIN_MEMORY_LIMIT))
+
+
+def _replace_signins(records) -> None:
+    signins = collections.deque(records, maxlen=SIGNIN_MEMORY_LIMIT)
+    with STATE_LOCK:
+        DATA['signins'] = signins
 
 
 def save_settings() -> None:
     """Persist runtime settings such as webhook URLs."""
     try:
-        _settings_store().save(SETTINGS)
+        with _SETTINGS_WRITE_LOCK:
+            # Snapshot under the write lock so the last save always writes the
+            # latest settings, but write the file after releasing STATE_LOCK.
+            with STATE_LOCK:
+                snapshot = dict(SETTINGS)
+            _settings_store().save(snapshot)
     except OSError:
         # Failing to persist settings should not crash the app; configuration can
         # simply be re-entered if the write fails.
@@ -183,9 +656,20 @@ def load_settings() -> None:
         SETTINGS['teams_webhook_url'] = webhook
 
 
+_TODAY_CACHE = ['', float('-inf')]
+
+
+def today_iso() -> str:
+    """Return today's date as ``YYYY-MM-DD``, recomputed at most once a second."""
+    now = time.monotonic()
+    if now - _TODAY_CACHE[1] >= 1.0:
+        _TODAY_CACHE[:] = [datetime.date.today().isoformat(), now]
+    return _TODAY_CACHE[0]
+
+
 def build_emergency_status():
     """Compile lists of present and missing individuals for today's schedule."""
-    return REPORTING_SERVICE.build_emergency_status()
+    return REPORTING_SERVICE.build_emergency_status(today_iso())
 
 
 def format_emergency_markdown(status):
@@ -201,31 +685,25 @@ def format_emergency_markdown(status):
     if status['present']:
         lines.append('**Present**')
         for person in status['present']:
-            timestamp = person.get('timestamp', '')
+            get = person.get
+            person_type, name, site = get('person_type', ''), get('name', ''), get('site', '')
+            timestamp = get('timestamp', '')
             if timestamp:
-                lines.append(
-                    f"- {person.get('person_type', '')}: {person.get('name', '')} @ {person.get('site', '')} (since {timestamp})"
-                )
+                lines.append(f"- {person_type}: {name} @ {site} (since {timestamp})")
             else:
-                lines.append(
-                    f"- {person.get('person_type', '')}: {person.get('name', '')} @ {person.get('site', '')}"
-                )
+                lines.append(f"- {person_type}: {name} @ {site}")
         lines.append('')
 
     if status['missing']:
         lines.append('**Missing Individuals**')
         for person in status['missing']:
-            contact_details = ', '.join(
-                filter(None, [person.get('contact_name', ''), person.get('contact_phone', '')])
-            )
+            get = person.get
+            person_type, name, site = get('person_type', ''), get('name', ''), get('site', '')
+            contact_details = ', '.join(filter(None, [get('contact_name', ''), get('contact_phone', '')]))
             if contact_details:
-                lines.append(
-                    f"- {person.get('person_type', '')}: {person.get('name', '')} (Site: {person.get('site', '')}; Contact: {contact_details})"
-                )
+                lines.append(f"- {person_type}: {name} (Site: {site}; Contact: {contact_details})")
             else:
-                lines.append(
-                    f"- {person.get('person_type', '')}: {person.get('name', '')} (Site: {person.get('site', '')})"
-                )
+                lines.append(f"- {person_type}: {name} (Site: {site})")
         lines.append('')
     else:
         lines.append('All scheduled individuals are accounted for.')
@@ -247,6 +725,45 @@ def send_teams_notification(webhook, status):
     return _notification_service().send(webhook, markdown)
 
 
+def _log_notification_result(future) -> None:
+    try:
+        success, message = future.result()
+    except Exception:  # pragma: no cover - defensive, the service catches network errors
+        LOGGER.exception("Teams notification raised an unexpected error")
+        return
+    if not success:
+        LOGGER.warning("Teams notification was not delivered: %s", message)
+
+
+def _send_pending_notification(webhook):
+    with _PENDING_LOCK:
+        status = _PENDING_NOTIFICATIONS.pop(webhook)
+    return send_teams_notification(webhook, status)
+
+
+def dispatch_teams_notification(webhook, status):
+    """Queue the emergency status for delivery to Microsoft Teams.
+
+    The webhook call happens on a background thread. The returned future
+    resolves to the same ``(success, message)`` tuple as
+    :func:`send_teams_notification`; failed deliveries are also logged because
+    the HTTP response has usually been sent by the time they complete.
+
+    Bursts are coalesced: if a notification for ``webhook`` is still waiting to
+    be sent, its status is replaced with ``status`` and ``None`` is returned,
+    so repeated clicks post the latest roll call once instead of many times.
+    """
+
+    with _PENDING_LOCK:
+        already_queued = webhook in _PENDING_NOTIFICATIONS
+        _PENDING_NOTIFICATIONS[webhook] = status
+    if already_queued:
+        return None
+    future = _NOTIFY_POOL.submit(_send_pending_notification, webhook)
+    future.add_done_callback(_log_notification_result)
+    return future
+
+
 class SignInHTTPRequestHandler(BaseHTTPRequestHandler):
     """Request handler for the sign‑in application.
 
@@ -261,13 +778,48 @@ class SignInHTTPRequestHandler(BaseHTTPRequestHandler):
         content: bytes,
         content_type: str = 'text/html',
         status: HTTPStatus = HTTPStatus.OK,
+        compressible: bool = True,
+        extra_headers: tuple = (),
     ):
         self.send_response(status)
         self.send_header('Content-Type', content_type)
+        for name, value in extra_headers:
+            self.send_header(name, value)
+        if compressible and (content_type.startswith('text/') or content_type.startswith('application/json')):
+            self.send_header('Vary', 'Accept-Encoding')
+            if len(content) > _GZIP_MIN_SIZE and _accepts_gzip(self.headers.get('Accept-Encoding', '')):
+                content = _gzip_bytes(content)
+                self.send_header('Content-Encoding', 'gzip')
         self.send_header('Content-Length', str(len(content)))
-        self.end_headers()
+        self._end_headers_with(content)
+
+    def _end_headers_with(self, content: bytes) -> None:
+        """Finish the header block and send it together with ``content``.
+
+        ``BaseHTTPRequestHandler`` buffers headers until ``end_headers``;
+        appending the body to that buffer turns the usual header write plus
+        body write into a single send on the socket.
+        """
+        if self.request_version == 'HTTP/0.9' or not hasattr(self, '_headers_buffer'):
+            # HTTP/0.9 responses carry no headers, so nothing was buffered.
+            self.end_headers()
+            if self.command != 'HEAD':
+                self.wfile.write(content)
+            return
+        self._headers_buffer.append(b'\r\n')
         if self.command != 'HEAD':
-            self.wfile.write(content)
+            self._headers_buffer.append(content)
+        self.flush_headers()
+
+    def _content_length(self, value=None) -> int:
+        """Return the request's Content-Length, treating malformed values as 0.
+
+        Handlers that already looked the header up can pass ``value`` to skip a
+        second scan of the header list.
+        """
+        if value is None:
+            value = self.headers.get('Content-Length', '')
+        return int(value) if value.isascii() and value.isdigit() else 0
 
     def do_GET(self):
         path = self.path.split('?')[0]
@@ -307,150 +859,68 @@ class SignInHTTPRequestHandler(BaseHTTPRequestHandler):
 
     # Static file serving (limited to CSS)
     def _serve_static(self, path: str):
-        file_path = os.path.join(BASE_DIR, path.lstrip('/'))
-        if not os.path.isfile(file_path):
+        asset = _load_static(path)
+        if asset is None:
             self._send_response(b'File not found', 'text/plain', HTTPStatus.NOT_FOUND)
             return
-        with open(file_path, 'rb') as f:
-            content = f.read()
-        content_type = 'text/css' if file_path.endswith('.css') else 'application/octet-stream'
-        self._send_response(content, content_type)
+        content, content_type, etag = asset
+        if _etag_matches(self.headers.get('If-None-Match', ''), etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', etag)
+            self._end_headers_with(b'')
+            return
+        self._send_response(content, content_type, extra_headers=(('ETag', etag),))
 
     # Page templates
     def _html_template(self, title: str, body: str) -> bytes:
         """Wrap the provided body in a simple HTML document."""
-        html = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-  <meta charset="UTF-8">
-  <meta name="viewport" content="width=device-width, initial-scale=1.0">
-  <title>{title}</title>
-  <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.1/dist/css/bootstrap.min.css">
-</head>
-<body class="bg-light">
-<nav class="navbar navbar-expand-lg navbar-dark bg-primary mb-4">
-  <div class="container-fluid">
-    <a class="navbar-brand" href="/">ABA Sign In</a>
-    <button class="navbar-toggler" type="button" data-bs-toggle="collapse" data-bs-target="#navbarNav" aria-controls="navbarNav" aria-expanded="false" aria-label="Toggle navigation">
-      <span class="navbar-toggler-icon"></span>
-    </button>
-    <div class="collapse navbar-collapse" id="navbarNav">
-      <ul class="navbar-nav">
-        <li class="nav-item"><a class="nav-link" href="/">Home</a></li>
-        <li class="nav-item"><a class="nav-link" href="/admin">Admin</a></li>
-        <li class="nav-item"><a class="nav-link" href="/emergency">Emergency</a></li>
-        <li class="nav-item"><a class="nav-link" href="/load_data">Load Data</a></li>
-      </ul>
-    </div>
-  </div>
-</nav>
-<div class="container">
-  {body}
-</div>
-</body>
-</html>
-"""
-        return html.encode('utf-8')
+        return render_page(title, body)
 
     def _serve_home(self):
         """Serve the home page with sign‑in/out forms."""
-        # Build options for staff and clients
-        staff_options = ''.join([f'<option value="staff|{sid}">{rec.get("name", "")}</option>' for sid, rec in DATA['staff'].items()])
-        client_options = ''.join([f'<option value="client|{cid}">{rec.get("name", "")}</option>' for cid, rec in DATA['clients'].items()])
-        body = f"""
-<div class="row">
-  <div class="col-md-6">
-    <h2>Staff Sign In/Out</h2>
-    <form method="post" action="/sign_action">
-      <div class="mb-3">
-        <label for="staff_select" class="form-label">Select staff member</label>
-        <select class="form-select" id="staff_select" name="person" required>
-          <option value="">-- Choose staff --</option>
-          {staff_options}
-        </select>
-      </div>
-      <div class="mb-3">
-        <label class="form-label">Action</label><br>
-        <div class="form-check form-check-inline">
-          <input class="form-check-input" type="radio" name="action" id="staff_in" value="sign_in" checked>
-          <label class="form-check-label" for="staff_in">Sign In</label>
-        </div>
-        <div class="form-check form-check-inline">
-          <input class="form-check-input" type="radio" name="action" id="staff_out" value="sign_out">
-          <label class="form-check-label" for="staff_out">Sign Out</label>
-        </div>
-      </div>
-      <div class="mb-3">
-        <label for="staff_site" class="form-label">Site</label>
-        <input type="text" class="form-control" id="staff_site" name="site" placeholder="e.g. Fort Wayne" required>
-      </div>
-      <button type="submit" class="btn btn-primary">Submit</button>
-    </form>
-  </div>
-  <div class="col-md-6">
-    <h2>Client Sign In/Out</h2>
-    <form method="post" action="/sign_action">
-      <div class="mb-3">
-        <label for="client_select" class="form-label">Select client</label>
-        <select class="form-select" id="client_select" name="person" required>
-          <option value="">-- Choose client --</option>
-          {client_options}
-        </select>
-      </div>
-      <div class="mb-3">
-        <label class="form-label">Action</label><br>
-        <div class="form-check form-check-inline">
-          <input class="form-check-input" type="radio" name="action" id="client_in" value="sign_in" checked>
-          <label class="form-check-label" for="client_in">Sign In</label>
-        </div>
-        <div class="form-check form-check-inline">
-          <input class="form-check-input" type="radio" name="action" id="client_out" value="sign_out">
-          <label class="form-check-label" for="client_out">Sign Out</label>
-        </div>
-      </div>
-      <div class="mb-3">
-        <label for="client_site" class="form-label">Site</label>
-        <input type="text" class="form-control" id="client_site" name="site" placeholder="e.g. Fort Wayne" required>
-      </div>
-      <button type="submit" class="btn btn-primary">Submit</button>
-    </form>
-  </div>
-</div>
-"""
-        self._send_response(self._html_template('Home - ABA Sign In', body))
+        staff_options = _person_options('staff', DATA['staff'])
+        client_options = _person_options('client', DATA['clients'])
+        cached_staff, cached_clients, page = _HOME_PAGE_CACHE[0]
+        if cached_staff is not staff_options or cached_clients is not client_options:
+            body = _HOME_BODY(staff_options=staff_options, client_options=client_options)
+            page = _prerendered(self._html_template('Home - ABA Sign In', body))
+            _HOME_PAGE_CACHE[0] = (staff_options, client_options, page)
+        self._send_response(page)
 
     def _handle_sign_action(self):
         """Process a sign‑in or sign‑out form submission."""
-        ctype, pdict = cgi.parse_header(self.headers.get('Content-Type'))
+        headers = self.headers
+        ctype, params = parse_options_header(headers.get('Content-Type'))
+        length = self._content_length(headers.get('Content-Length', ''))
+        fields = {}
         if ctype == 'multipart/form-data':
-            form = cgi.FieldStorage(fp=self.rfile, headers=self.headers, environ={'REQUEST_METHOD': 'POST'})
-        else:
-            length = int(self.headers.get('Content-Length', 0))
-            data = self.rfile.read(length).decode('utf-8')
-            form = parse_qs(data)
-        # Extract fields
-        person_field = form.get('person')
-        action_field = form.get('action')
-        site_field = form.get('site')
-        if isinstance(person_field, list):
-            person_field = person_field[0]
-        if isinstance(action_field, list):
-            action_field = action_field[0]
-        if isinstance(site_field, list):
-            site_field = site_field[0]
-        if isinstance(action_field, str):
-            action_field = action_field.strip()
-        if isinstance(site_field, str):
-            site_field = site_field.strip()
+            boundary = params.get('boundary', '')
+            if boundary and length:
+                try:
+                    form = MultipartParser(boundary.encode('latin-1')).parse(self.rfile, length)
+                except MultipartError:
+                    pass  # Reported below as an invalid form.
+                else:
+                    form.close()
+                    fields = form.fields
+        elif length:
+            try:
+                # First value wins for repeated keys, as with parse_qs()[key][0].
+                for key, value in parse_qsl(self.rfile.read(length).decode('utf-8'), max_num_fields=16):
+                    fields.setdefault(key, value)
+            except ValueError:
+                fields = {}
+        person_field = fields.get('person')
+        action_field = fields.get('action', '').strip()
+        site_field = fields.get('site', '').strip()
         if not (person_field and action_field and site_field):
-            self._send_response(self._html_template('Error', '<p class="text-danger">Invalid form submission.</p>'))
+            self._send_response(_INVALID_FORM_PAGE)
             return
         # person_field is of the form "type|id"
         try:
             ptype, pid = person_field.split('|')
         except ValueError:
-            self._send_response(self._html_template('Error', '<p class="text-danger">Invalid person selected.</p>'))
+            self._send_response(_INVALID_PERSON_PAGE)
             return
         try:
             event = _sign_in_service().record_action(
@@ -475,24 +945,48 @@ class SignInHTTPRequestHandler(BaseHTTPRequestHandler):
 
     def _serve_admin(self):
         """Serve the admin dashboard with sign‑in history and schedule comparison."""
-        today = datetime.date.today().isoformat()
+        today = today_iso()
         rows = REPORTING_SERVICE.build_schedule_matrix(today)
-        table_rows = ''.join(
-            [
-                f"<tr><td>{row['person_type']}</td><td>{row['name']}</td><td>{row['start_time']}</td>"
-                f"<td>{row['end_time']}</td><td>{row['site']}</td><td>{row['status']}</td><td>{row['sign_time']}</td></tr>"
-                for row in rows
-            ]
-        )
-        # Build sign-in history table rows separately to avoid quoting issues in f-string
-        history_entries = []
-        for rec in DATA['signins'][-20:][::-1]:
-            # Format action string by replacing underscores
-            action_str = rec['action'].replace('_', ' ').title()
-            history_entries.append(
-                f"<tr><td>{rec['timestamp']}</td><td>{rec['person_type'].title()}</td><td>{rec['name']}</td><td>{rec['site']}</td><td>{action_str}</td></tr>"
-            )
-        history_rows = ''.join(history_entries)
+        escape = html.escape
+        # Rows are emitted as flat fragments and joined once; every value is
+        # escaped since names and sites come from uploaded CSVs.
+        parts = []
+        append = parts.append
+        for row in rows:
+            append('<tr><td>')
+            append(escape(row['person_type']))
+            append('</td><td>')
+            append(escape(row['name']))
+            append('</td><td>')
+            append(escape(row['start_time']))
+            append('</td><td>')
+            append(escape(row['end_time']))
+            append('</td><td>')
+            append(escape(row['site']))
+            append('</td><td>')
+            append(row['status'])
+            append('</td><td>')
+            append(escape(row['sign_time']))
+            append('</td></tr>')
+        table_rows = ''.join(parts)
+        # Copy the tail under the lock, then render without holding it.
+        with STATE_LOCK:
+            recent = list(itertools.islice(reversed(DATA['signins']), 20))
+        parts = []
+        append = parts.append
+        for rec in recent:
+            append('<tr><td>')
+            append(escape(rec['timestamp']))
+            append('</td><td>')
+            append(escape(rec['person_type'].title()))
+            append('</td><td>')
+            append(escape(rec['name']))
+            append('</td><td>')
+            append(escape(rec['site']))
+            append('</td><td>')
+            append(escape(rec['action'].replace('_', ' ').title()))
+            append('</td></tr>')
+        history_rows = ''.join(parts)
         body = f"""
 <h2>Admin Dashboard</h2>
 <p>Today is {today}</p>
@@ -521,22 +1015,22 @@ class SignInHTTPRequestHandler(BaseHTTPRequestHandler):
         """Serve the emergency page showing who's on site and who is missing."""
         status = build_emergency_status()
         present_rows = ''.join([
-            '<tr>'
-            f"<td>{html.escape(person.get('person_type', ''))}</td>"
-            f"<td>{html.escape(person.get('name', ''))}</td>"
-            f"<td>{html.escape(person.get('site', ''))}</td>"
-            f"<td>{html.escape(person.get('timestamp', ''))}</td>"
-            '</tr>'
+            _cached_row((
+                person.get('person_type', ''),
+                person.get('name', ''),
+                person.get('site', ''),
+                person.get('timestamp', ''),
+            ))
             for person in status['present']
         ])
         missing_rows = ''.join([
-            '<tr>'
-            f"<td>{html.escape(person.get('person_type', ''))}</td>"
-            f"<td>{html.escape(person.get('name', ''))}</td>"
-            f"<td>{html.escape(person.get('site', ''))}</td>"
-            f"<td>{html.escape(person.get('contact_name', ''))}</td>"
-            f"<td>{html.escape(person.get('contact_phone', ''))}</td>"
-            '</tr>'
+            _cached_row((
+                person.get('person_type', ''),
+                person.get('name', ''),
+                person.get('site', ''),
+                person.get('contact_name', ''),
+                person.get('contact_phone', ''),
+            ))
             for person in status['missing']
         ])
         if SETTINGS.get('teams_webhook_url'):
@@ -595,33 +1089,32 @@ class SignInHTTPRequestHandler(BaseHTTPRequestHandler):
         now = datetime.datetime.now()
         default_timestamp = now.strftime('%Y-%m-%dT%H:%M')
         missing_sections = []
+        escape = html.escape
         for person in status['missing']:
+            get = person.get
             field_name = self._reason_field_name(person)
-            options = ['<option value="">-- Select reason --</option>'] + [
-                f"<option value=\"{html.escape(reason)}\">{html.escape(reason)}</option>"
-                for reason in FIRE_DRILL_REASON_OPTIONS
-            ]
             missing_sections.append(
                 "<div class=\"mb-3\">"
                 f"  <label class=\"form-label\" for=\"{field_name}\">"
-                f"{html.escape(person.get('person_type', ''))} - {html.escape(person.get('name', ''))} ({html.escape(person.get('site', '')) or 'No site'})"
+                f"{escape(get('person_type', ''))} - {escape(get('name', ''))} ({escape(get('site', '')) or 'No site'})"
                 "</label>"
                 f"  <select class=\"form-select\" id=\"{field_name}\" name=\"{field_name}\" required>"
-                f"    {' '.join(options)}"
+                f"    {_REASON_OPTIONS_HTML}"
                 "  </select>"
                 "</div>"
             )
         missing_html = ''.join(missing_sections) or '<p class="text-muted">All individuals accounted for.</p>'
-        present_html = ''.join(
-            [
+        present_items = []
+        for person in status['present']:
+            get = person.get
+            present_items.append(
                 '<li class="list-group-item">'
-                f"<strong>{html.escape(person.get('person_type', ''))}</strong>: {html.escape(person.get('name', ''))}"
-                f" &mdash; {html.escape(person.get('site', ''))}"
-                f" <span class=\"text-muted\">(since {html.escape(person.get('timestamp', ''))})</span>"
+                f"<strong>{escape(get('person_type', ''))}</strong>: {escape(get('name', ''))}"
+                f" &mdash; {escape(get('site', ''))}"
+                f" <span class=\"text-muted\">(since {escape(get('timestamp', ''))})</span>"
                 '</li>'
-                for person in status['present']
-            ]
-        ) or '<li class="list-group-item text-muted">No one is signed in.</li>'
+            )
+        present_html = ''.join(present_items) or '<li class="list-group-item text-muted">No one is signed in.</li>'
         body = f"""
 <h2>Fire Drill Report</h2>
 <p>Use this form to document the outcome of the most recent fire drill.</p>
@@ -657,30 +1150,37 @@ class SignInHTTPRequestHandler(BaseHTTPRequestHandler):
 
     def _handle_firedrill_report_submission(self):
         status = build_emergency_status()
-        length = int(self.headers.get('Content-Length', 0))
+        length = self._content_length()
         payload = self.rfile.read(length).decode('utf-8') if length else ''
-        params = parse_qs(payload)
-        location = params.get('location', [''])[0].strip()
-        drill_dt_raw = params.get('drill_datetime', [''])[0].strip()
-        if not location or not drill_dt_raw:
-            body = '<p class="text-danger">Fire drill date/time and location are required.</p><a href="/firedrill_report" class="btn btn-secondary">Back</a>'
-            self._send_response(self._html_template('Fire Drill Report Error', body))
-            return
+        # Every field is single-valued, so a flat dict avoids the list-per-key
+        # wrapping of parse_qs. The field cap bounds work on hostile payloads.
         try:
-            drill_dt = datetime.datetime.fromisoformat(drill_dt_raw)
+            params = dict(parse_qsl(payload, keep_blank_values=True, max_num_fields=4096))
         except ValueError:
-            body = '<p class="text-danger">Invalid date/time provided.</p><a href="/firedrill_report" class="btn btn-secondary">Back</a>'
-            self._send_response(self._html_template('Fire Drill Report Error', body))
+            self._send_response(_FIREDRILL_ERROR_PAGES['too_many_fields'])
+            return
+        location = params.get('location', '').strip()
+        drill_dt_raw = params.get('drill_datetime', '').strip()
+        if not location or not drill_dt_raw:
+            self._send_response(_FIREDRILL_ERROR_PAGES['missing_fields'])
+            return
+        drill_dt = None
+        if _DRILL_DATETIME_RE.fullmatch(drill_dt_raw):
+            try:
+                drill_dt = datetime.datetime.fromisoformat(drill_dt_raw)
+            except ValueError:
+                # Well-formed but out of range, e.g. month 13.
+                pass
+        if drill_dt is None:
+            self._send_response(_FIREDRILL_ERROR_PAGES['invalid_datetime'])
             return
         reasons = {}
         for person in status['missing']:
-            field = self._reason_field_name(person)
-            reason = params.get(field, [''])[0].strip()
-            if status['missing'] and not reason:
-                body = '<p class="text-danger">Please select a reason for each individual who was not accounted for.</p><a href="/firedrill_report" class="btn btn-secondary">Back</a>'
-                self._send_response(self._html_template('Fire Drill Report Error', body))
+            reason = params.get(self._reason_field_name(person), '').strip()
+            if not reason:
+                self._send_response(_FIREDRILL_ERROR_PAGES['missing_reason'])
                 return
-            reasons[(person.get('person_type'), person.get('person_id'))] = reason
+            reasons[(person.get('person_type', ''), person.get('person_id'))] = reason
 
         output = io.StringIO()
         writer = csv.writer(output)
@@ -690,26 +1190,17 @@ class SignInHTTPRequestHandler(BaseHTTPRequestHandler):
         writer.writerow(['Location', location])
         writer.writerow([])
         writer.writerow(['Person Type', 'Name', 'Site', 'Status', 'Details'])
+        writerow = writer.writerow
         for person in status['present']:
-            details = person.get('timestamp', '')
+            get = person.get
+            details = get('timestamp', '')
             detail_text = f"Signed in at {details}" if details else ''
-            writer.writerow([
-                person.get('person_type', ''),
-                person.get('name', ''),
-                person.get('site', ''),
-                'Accounted For',
-                detail_text,
-            ])
+            writerow([get('person_type', ''), get('name', ''), get('site', ''), 'Accounted For', detail_text])
         for person in status['missing']:
-            key = (person.get('person_type'), person.get('person_id'))
-            reason = reasons.get(key, 'Reason not provided')
-            writer.writerow([
-                person.get('person_type', ''),
-                person.get('name', ''),
-                person.get('site', ''),
-                'Not Accounted For',
-                reason,
-            ])
+            get = person.get
+            person_type = get('person_type', '')
+            reason = reasons.get((person_type, get('person_id')), 'Reason not provided')
+            writerow([person_type, get('name', ''), get('site', ''), 'Not Accounted For', reason])
 
         csv_data = output.getvalue().encode('utf-8')
         safe_location = ''.join(ch if ch.isalnum() or ch in ('-', '_') else '_' for ch in location.strip()) or 'location'
@@ -719,156 +1210,140 @@ class SignInHTTPRequestHandler(BaseHTTPRequestHandler):
         self.send_header('Content-Type', 'text/csv; charset=utf-8')
         self.send_header('Content-Disposition', f'attachment; filename="{filename}"')
         self.send_header('Content-Length', str(len(csv_data)))
-        self.end_headers()
-        self.wfile.write(csv_data)
+        self._end_headers_with(csv_data)
 
     def _serve_load_data_page(self):
         """Serve the page for uploading CSV files."""
-        webhook_status = 'Configured' if SETTINGS.get('teams_webhook_url') else 'Not Configured'
-        webhook_hint = (
-            f"<span class=\"badge bg-success\">{webhook_status}</span>"
-            if SETTINGS.get('teams_webhook_url')
-            else f"<span class=\"badge bg-secondary\">{webhook_status}</span>"
-        )
-        body = f"""
-<h2>Load Data</h2>
-<p>Use this page to upload CSV files for staff, clients, and schedules. The server will overwrite existing data in memory.</p>
-<div class="row">
-  <div class="col-md-4">
-    <h4>Upload Staff CSV</h4>
-    <form method="post" action="/upload_csv" enctype="multipart/form-data">
-      <input type="hidden" name="category" value="staff">
-      <div class="mb-3">
-        <input class="form-control" type="file" name="file" accept=".csv" required>
-      </div>
-      <button type="submit" class="btn btn-primary">Upload Staff</button>
-    </form>
-  </div>
-  <div class="col-md-4">
-    <h4>Upload Clients CSV</h4>
-    <form method="post" action="/upload_csv" enctype="multipart/form-data">
-      <input type="hidden" name="category" value="clients">
-      <div class="mb-3">
-        <input class="form-control" type="file" name="file" accept=".csv" required>
-      </div>
-      <button type="submit" class="btn btn-primary">Upload Clients</button>
-    </form>
-  </div>
-  <div class="col-md-4">
-    <h4>Upload Schedule CSV</h4>
-    <form method="post" action="/upload_csv" enctype="multipart/form-data">
-      <input type="hidden" name="category" value="schedule">
-      <div class="mb-3">
-        <input class="form-control" type="file" name="file" accept=".csv" required>
-      </div>
-      <button type="submit" class="btn btn-primary">Upload Schedule</button>
-    </form>
-  </div>
-</div>
-<hr>
-<div class="row">
-  <div class="col-md-6">
-    <h4>Microsoft Teams Emergency Notifications {webhook_hint}</h4>
-    <p>Provide an incoming webhook URL from your Microsoft Teams channel to enable one-click emergency notifications.</p>
-    <form method="post" action="/configure_teams">
-      <div class="mb-3">
-        <label for="teams_webhook" class="form-label">Teams Webhook URL</label>
-        <input type="url" class="form-control" id="teams_webhook" name="webhook" placeholder="https://..." value="{SETTINGS.get('teams_webhook_url', '')}" required>
-      </div>
-      <button type="submit" class="btn btn-primary">Save Webhook</button>
-    </form>
-    <p class="mt-2 text-muted">The URL is stored on this server only and used when sending an emergency notification.</p>
-  </div>
-</div>
-"""
-        self._send_response(self._html_template('Load Data', body))
+        self._send_response(_load_data_page(SETTINGS.get('teams_webhook_url', '')))
 
     def _handle_upload_csv(self):
         """Handle CSV uploads for staff, clients, and schedule."""
-        # Parse the incoming form data. Use cgi.FieldStorage to support file upload.
-        environ = {
-            'REQUEST_METHOD': 'POST',
-            'CONTENT_TYPE': self.headers.get('Content-Type', ''),
-        }
-        content_length = self.headers.get('Content-Length')
-        if content_length is not None:
-            environ['CONTENT_LENGTH'] = content_length
-        form = cgi.FieldStorage(fp=self.rfile, headers=self.headers, environ=environ)
-        category = form.getvalue('category')
-        fileitem = form['file'] if 'file' in form else None
-        if (
-            category not in ('staff', 'clients', 'schedule')
-            or fileitem is None
-            or getattr(fileitem, 'file', None) is None
-        ):
-            self._send_response(self._html_template('Error', '<p class="text-danger">Invalid upload request.</p>'))
+        headers = self.headers
+        ctype, params = parse_options_header(headers.get('Content-Type'))
+        length = self._content_length(headers.get('Content-Length', ''))
+        if length > APP_CONFIG.max_upload_bytes:
+            # Refuse before reading any of the body. Closing the connection
+            # (announced so keep-alive clients do not reuse it) discards the
+            # unread bytes instead of draining them.
+            limit = APP_CONFIG.max_upload_bytes // (1024 * 1024)
+            self._send_response(
+                self._html_template('Upload Error', _UPLOAD_TOO_LARGE_BODY(limit=limit)),
+                status=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                extra_headers=(('Connection', 'close'),),
+            )
             return
-        # Save the uploaded file to a temporary location
-        upload_path = os.path.join(RUNTIME_DIR, f'tmp_upload_{category}.csv')
-        with open(upload_path, 'wb') as fout:
-            while True:
-                chunk = fileitem.file.read(8192)
-                if not chunk:
-                    break
-                fout.write(chunk)
-        # Load into memory
+        boundary = params.get('boundary', '')
+        form = None
+        if ctype == 'multipart/form-data' and boundary and length:
+            try:
+                parser = MultipartParser(boundary.encode('latin-1'))
+                form = parser.parse(self.rfile, length)
+            except MultipartError:
+                pass  # Reported below as an invalid upload.
+        category = form.fields.get('category') if form is not None else None
+        fileitem = form.files.get('file') if form is not None else None
+        if category not in ('staff', 'clients', 'schedule') or fileitem is None:
+            if form is not None:
+                form.close()
+            self._send_response(_INVALID_UPLOAD_PAGE)
+            return
+        # Parse straight from the uploaded stream rather than copying it to a
+        # temporary file and reading it back.
+        csv_stream = io.TextIOWrapper(fileitem.file, encoding='utf-8', newline='')
         try:
             if category in ('staff', 'clients'):
-                load_csv(upload_path, category)
+                load_csv(csv_stream, category)
             else:
-                load_schedule_csv(upload_path)
+                load_schedule_csv(csv_stream)
         except Exception as e:
-            body = f'<p class="text-danger">Error processing CSV: {e}</p>'
-            self._send_response(self._html_template('Upload Error', body))
+            self._send_response(self._html_template('Upload Error', _UPLOAD_ERROR_BODY(error=html.escape(str(e)))))
             return
-        body = f'<div class="alert alert-success" role="alert">Successfully loaded {category} data.</div><a href="/load_data" class="btn btn-primary">Back to Load Data</a>'
-        self._send_response(self._html_template('Upload Successful', body))
+        finally:
+            # Detach rather than close so the pooled upload buffer can be reused.
+            csv_stream.detach()
+            form.close()
+        self._send_response(_UPLOAD_SUCCESS_PAGES[category])
 
     def _handle_configure_teams(self):
         """Store the Microsoft Teams webhook URL provided by the admin."""
-        length = int(self.headers.get('Content-Length', 0))
+        length = self._content_length()
         payload = self.rfile.read(length).decode('utf-8') if length else ''
-        params = parse_qs(payload)
-        webhook = params.get('webhook', [''])[0].strip()
+        webhook = ''
+        try:
+            # The form has a single field; stop at it rather than building a
+            # dict of lists, and refuse payloads stuffed with extra fields.
+            for key, value in parse_qsl(payload, max_num_fields=4):
+                if key == 'webhook':
+                    webhook = value.strip()
+                    break
+        except ValueError:
+            webhook = ''
         if not webhook:
-            body = '<p class="text-danger">No webhook URL provided.</p><a href="/load_data" class="btn btn-secondary">Back</a>'
-            self._send_response(self._html_template('Teams Configuration Error', body))
+            self._send_response(_TEAMS_NO_WEBHOOK_PAGE)
             return
-        if not webhook.lower().startswith('https://'):
-            body = '<p class="text-danger">Webhook URLs must start with https://</p><a href="/load_data" class="btn btn-secondary">Back</a>'
-            self._send_response(self._html_template('Teams Configuration Error', body))
+        if not _HTTPS_URL_RE.match(webhook):
+            self._send_response(_TEAMS_NOT_HTTPS_PAGE)
             return
-        SETTINGS['teams_webhook_url'] = webhook
+        with STATE_LOCK:
+            SETTINGS['teams_webhook_url'] = webhook
         save_settings()
-        body = '<div class="alert alert-success" role="alert">Microsoft Teams webhook saved.</div><a href="/load_data" class="btn btn-primary">Back to Load Data</a>'
-        self._send_response(self._html_template('Teams Configuration Saved', body))
+        self._send_response(_TEAMS_SAVED_PAGE)
 
     def _handle_notify_teams(self):
         """Send an emergency notification to Microsoft Teams."""
         webhook = SETTINGS.get('teams_webhook_url', '').strip()
         if not webhook:
-            body = '<p class="text-danger">No Microsoft Teams webhook configured.</p><a href="/emergency" class="btn btn-secondary">Back</a>'
-            self._send_response(self._html_template('Notification Error', body))
+            self._send_response(_NOTIFY_NO_WEBHOOK_PAGE)
             return
         status = build_emergency_status()
-        success, message = send_teams_notification(webhook, status)
-        if not success:
-            body = f'<p class="text-danger">{message}</p><a href="/emergency" class="btn btn-secondary">Back to Emergency</a>'
-            self._send_response(self._html_template('Notification Error', body))
-            return
-        body = f'<div class="alert alert-success" role="alert">{message}</div><a href="/emergency" class="btn btn-primary">Back to Emergency</a>'
-        self._send_response(self._html_template('Notification Sent', body))
+        dispatch_teams_notification(webhook, status)
+        self._send_response(_NOTIFY_QUEUED_PAGE, status=HTTPStatus.ACCEPTED)
 
 
-def _initial_data_paths(filename: str):
-    """Yield potential CSV locations for bundled starter data."""
+def _existing_data_paths(filename: str) -> tuple:
+    """Return bundled CSV locations for ``filename`` that exist, in priority order."""
     # Prefer files stored in the optional ``data`` subdirectory but fall back to
     # CSVs located next to ``app.py``. The repository already ships sample
     # ``staff.csv``, ``clients.csv`` and ``schedule.csv`` files in the project
     # root, so checking both locations lets the application work out-of-the-box
     # without any manual uploads.
-    yield os.path.join(BASE_DIR, 'data', filename)
-    yield os.path.join(BASE_DIR, filename)
+    candidates = (os.path.join(BASE_DIR, 'data', filename), os.path.join(BASE_DIR, filename))
+    return tuple(path for path in candidates if os.path.isfile(path))
+
+
+# Resolved once at import: category -> existing starter CSV paths.
+_INITIAL_DATA_PATHS = {
+    'staff': _existing_data_paths('staff.csv'),
+    'clients': _existing_data_paths('clients.csv'),
+    'schedule': _existing_data_paths('schedule.csv'),
+}
+
+
+def _load_initial_category(category: str) -> None:
+    """Load the first bundled CSV for ``category`` that parses successfully."""
+    for csv_path in _INITIAL_DATA_PATHS[category]:
+        try:
+            if category == 'schedule':
+                load_schedule_csv(csv_path)
+            else:
+                load_csv(csv_path, category)
+            return
+        except Exception:
+            # Try the next candidate file if parsing fails.
+            continue
+
+
+class SignInHTTPServer(ThreadingHTTPServer):
+    """Threaded server with a listen backlog sized for bursts of sign-ins.
+
+    All state lives in this process (``DATA``, ``SETTINGS`` and the snapshot
+    writer), so the server scales with threads rather than forked workers;
+    separate processes would each hold a diverging copy of the sign-ins.
+    """
+
+    # socketserver's default backlog of 5 drops connections when a class
+    # arrives at once and everyone signs in within the same second.
+    request_queue_size = 128
 
 
 def run_server(port: int = 8000):
@@ -878,25 +1353,10 @@ def run_server(port: int = 8000):
     # Optionally pre-load CSVs if present in either the ``data`` directory or
     # alongside this script. The first matching path wins so users can override
     # the bundled examples by dropping replacement files into ``data/``.
-    for category in ('staff', 'clients'):
-        for csv_path in _initial_data_paths(f'{category}.csv'):
-            if not os.path.isfile(csv_path):
-                continue
-            try:
-                load_csv(csv_path, category)
-                break
-            except Exception:
-                # Try the next candidate file if parsing fails.
-                continue
-    for csv_path in _initial_data_paths('schedule.csv'):
-        if not os.path.isfile(csv_path):
-            continue
-        try:
-            load_schedule_csv(csv_path)
-            break
-        except Exception:
-            continue
-    server = HTTPServer(('0.0.0.0', port), SignInHTTPRequestHandler)
+    # The categories are independent, so load them concurrently.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(_INITIAL_DATA_PATHS)) as pool:
+        concurrent.futures.wait([pool.submit(_load_initial_category, category) for category in _INITIAL_DATA_PATHS])
+    server = SignInHTTPServer(('0.0.0.0', port), SignInHTTPRequestHandler)
     print(f"Server starting on http://localhost:{port} ...")
     server.serve_forever()
 
@@ -1,138 +1,112 @@
 """Comprehensive integration and unit tests for the ABA sign-in app."""
 
 import datetime
+import gzip
 import http.client
+import io
 import json
 import os
+import pathlib
+import re
+import shutil
+import socket
 import tempfile
 import threading
 import unittest
 from unittest import mock
 import urllib.error
+from urllib.parse import urlencode
 
+from aba_enterprise import forms, persistence
 import app
 
 
-class SignInServerTestCase(unittest.TestCase):
-    """Exercise the public functionality exposed by the HTTP server."""
-
-    @classmethod
-    def setUpClass(cls):
-        # Use a temporary runtime directory so tests do not affect repo state.
-        cls._runtime_dir = tempfile.mkdtemp(prefix="aba_runtime_")
-        app.RUNTIME_DIR = cls._runtime_dir
-        os.makedirs(app.RUNTIME_DIR, exist_ok=True)
+# Matches any fire drill reason, longest first, so one scan of a page finds
+# every option it offers.
+_REASON_OPTION_RE = re.compile(
+    '|'.join(map(re.escape, sorted(app.FIRE_DRILL_REASON_OPTIONS, key=len, reverse=True)))
+)
+
+# Request bodies are encoded once at import and shared by the tests.
+_FORM_HEADERS = {'Content-Type': 'application/x-www-form-urlencoded'}
+_SIGN_IN_BODY = urlencode(
+    [('person', 'staff|s1'), ('action', 'sign_in'), ('site', 'Fort Wayne')]
+).encode('ascii')
+_SIGN_OUT_BODY = urlencode(
+    [('person', 'staff|s1'), ('action', 'sign_out'), ('site', 'Fort Wayne')]
+).encode('ascii')
+_FIRE_DRILL_BODY = urlencode(
+    [
+        ('drill_datetime', '2030-01-01T10:00'),
+        ('location', 'Fort Wayne Center'),
+        ('reason_client_c1', 'Sick/Called off'),
+        ('reason_client_c2', 'On community outing'),
+    ]
+).encode('ascii')
+
+_UPLOAD_BOUNDARY = '----WebKitFormBoundaryTEST'
+_UPLOAD_HEADERS = {'Content-Type': f'multipart/form-data; boundary={_UPLOAD_BOUNDARY}'}
+_NEW_STAFF_CSV = (
+    'id,name,email,phone,site,contact_name,contact_phone\n'
+    's9,Zelda Therapist,zelda@example.com,555-0900,Chicago,Supervisor Sam,555-0901\n'
+)
+_UPLOAD_STAFF_BODY = (
+    f'--{_UPLOAD_BOUNDARY}\r\n'
+    'Content-Disposition: form-data; name="category"\r\n\r\n'
+    'staff\r\n'
+    f'--{_UPLOAD_BOUNDARY}\r\n'
+    'Content-Disposition: form-data; name="file"; filename="staff.csv"\r\n'
+    'Content-Type: text/csv\r\n\r\n'
+    f'{_NEW_STAFF_CSV}\r\n'
+    f'--{_UPLOAD_BOUNDARY}--\r\n'
+).encode('utf-8')
+
+
+class _KeepAliveHandler(app.SignInHTTPRequestHandler):
+    """Serve the tests over persistent HTTP/1.1 connections."""
+
+    protocol_version = 'HTTP/1.1'
+
+
+_RUNTIME_ROOT = None
+
+
+def setUpModule():
+    # Every runtime directory the tests create lives under one root, removed
+    # in a single rmtree when the module finishes.
+    global _RUNTIME_ROOT
+    _RUNTIME_ROOT = tempfile.mkdtemp(prefix='aba_runtime_')
+    app.RUNTIME_DIR = _RUNTIME_ROOT
+
+
+def tearDownModule():
+    app.flush_runtime_state()
+    shutil.rmtree(_RUNTIME_ROOT, ignore_errors=True)
+
+
+def _reset_state():
+    """Reset all in-memory data before each test to avoid state leakage."""
+    app.DATA['staff'] = {}
+    app.DATA['clients'] = {}
+    app.DATA['schedule'] = []
+    app.DATA['signins'] = []
+    app.SETTINGS['teams_webhook_url'] = ''
+
+
+class SignInUnitTestCase(unittest.TestCase):
+    """Exercise helpers that need neither the HTTP server nor the runtime directory."""
 
     def setUp(self):
-        # Reset all in-memory data before each test to avoid state leakage.
-        app.DATA['staff'] = {}
-        app.DATA['clients'] = {}
-        app.DATA['schedule'] = []
-        app.DATA['signins'] = []
-        app.SETTINGS['teams_webhook_url'] = ''
-        self.server = None
-        self.server_thread = None
-        self.port = None
-        self.today = datetime.date.today().isoformat()
-        snapshot_path = os.path.join(app.RUNTIME_DIR, 'signins.json')
-        if os.path.exists(snapshot_path):
-            os.remove(snapshot_path)
-
-    def tearDown(self):
-        if self.server is not None:
-            self.server.shutdown()
-            self.server.server_close()
-        if self.server_thread is not None:
-            self.server_thread.join(timeout=5)
+        _reset_state()
 
-    # Helper utilities -------------------------------------------------
-    def _populate_sample_data(self):
-        app.DATA['staff'] = {
-            's1': {
-                'id': 's1',
-                'name': 'Alice Therapist',
-                'email': 'alice@example.com',
-                'phone': '555-0100',
-                'site': 'Fort Wayne',
-                'contact_name': 'Supervisor Sue',
-                'contact_phone': '555-0101',
-            },
-        }
-        app.DATA['clients'] = {
-            'c1': {
-                'id': 'c1',
-                'name': 'Bobby Learner',
-                'contact_name': 'Parent Patty',
-                'contact_phone': '555-0201',
-                'site': 'Fort Wayne',
-            },
-            'c2': {
-                'id': 'c2',
-                'name': 'Charlie Learner',
-                'contact_name': 'Parent Paul',
-                'contact_phone': '555-0202',
-                'site': 'Fort Wayne',
-            },
-        }
-        app.DATA['schedule'] = [
-            {
-                'person_type': 'staff',
-                'id': 's1',
-                'date': self.today,
-                'start_time': '09:00',
-                'end_time': '17:00',
-                'site': 'Fort Wayne',
-            },
-            {
-                'person_type': 'client',
-                'id': 'c1',
-                'date': self.today,
-                'start_time': '09:00',
-                'end_time': '11:00',
-                'site': 'Fort Wayne',
-            },
-            {
-                'person_type': 'client',
-                'id': 'c2',
-                'date': self.today,
-                'start_time': '10:00',
-                'end_time': '12:00',
-                'site': 'Fort Wayne',
-            },
-        ]
-
-    def _start_server(self):
-        self.server = app.HTTPServer(('localhost', 0), app.SignInHTTPRequestHandler)
-        self.port = self.server.server_address[1]
-        self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
-        self.server_thread.start()
-
-    def _request(self, method, path, body=None, headers=None):
-        conn = http.client.HTTPConnection('localhost', self.port)
-        conn.request(method, path, body=body, headers=headers or {})
-        response = conn.getresponse()
-        data = response.read()
-        conn.close()
-        return response.status, response.getheader('Content-Type'), data
-
-    # Unit tests -------------------------------------------------------
     def test_load_csv_parses_staff_and_clients(self):
         staff_csv = "id,Name,Email,Phone,Site,Contact_Name,Contact_Phone\n" \
             "s2,Donna Therapist,don@example.com,555-0300,Chicago,Supervisor Sid,555-0301\n"
         clients_csv = "ID,Name,Contact_Name,Contact_Phone,Site\n" \
             "c3,Eddie Learner,Caregiver Cara,555-0400,Chicago\n"
-        with tempfile.NamedTemporaryFile('w+', delete=False, newline='') as staff_file:
-            staff_file.write(staff_csv)
-            staff_path = staff_file.name
-        with tempfile.NamedTemporaryFile('w+', delete=False, newline='') as client_file:
-            client_file.write(clients_csv)
-            client_path = client_file.name
-        try:
-            app.load_csv(staff_path, 'staff')
-            app.load_csv(client_path, 'clients')
-        finally:
-            os.remove(staff_path)
-            os.remove(client_path)
+        # The loaders accept open text streams, so no temporary files are needed.
+        app.load_csv(io.StringIO(staff_csv, newline=''), 'staff')
+        app.load_csv(io.StringIO(clients_csv, newline=''), 'clients')
 
         self.assertIn('s2', app.DATA['staff'])
         self.assertEqual(app.DATA['staff']['s2']['name'], 'Donna Therapist')
@@ -146,70 +120,449 @@ client,,2030-01-01,09:00,10:00,Fort Wayne
 coach,s2,2030-01-01,09:00,10:00,Fort Wayne
 client,c4,invalid,09:00,11:00,Fort Wayne
 """
-        with tempfile.NamedTemporaryFile('w+', delete=False, newline='') as schedule_file:
-            schedule_file.write(csv_contents)
-            schedule_path = schedule_file.name
-        try:
-            app.load_schedule_csv(schedule_path)
-        finally:
-            os.remove(schedule_path)
+        app.load_schedule_csv(io.StringIO(csv_contents, newline=''))
 
         self.assertEqual(len(app.DATA['schedule']), 1)
         self.assertEqual(app.DATA['schedule'][0]['id'], 's1')
 
+    def test_format_emergency_markdown_includes_present_and_missing(self):
+        status = {
+            'date': '2030-01-01',
+            'present': [
+                {
+                    'person_type': 'Staff',
+                    'person_id': 's1',
+                    'name': 'Alice',
+                    'site': 'Fort Wayne',
+                    'timestamp': '09:00',
+                }
+            ],
+            'missing': [
+                {
+                    'person_type': 'Client',
+                    'person_id': 'c1',
+                    'name': 'Bobby',
+                    'site': 'Fort Wayne',
+                    'contact_name': 'Parent Patty',
+                    'contact_phone': '555-0101',
+                }
+            ],
+        }
+        markdown = app.format_emergency_markdown(status)
+        self.assertIn('**Emergency Roll Call - 2030-01-01**', markdown)
+        self.assertIn('- Staff: Alice @ Fort Wayne (since 09:00)', markdown)
+        self.assertIn('- Client: Bobby (Site: Fort Wayne; Contact: Parent Patty, 555-0101)', markdown)
+
+    def test_send_teams_notification_handles_errors(self):
+        status = {
+            'date': '2030-01-01',
+            'present': [],
+            'missing': [],
+        }
+        with mock.patch('urllib.request.urlopen', side_effect=urllib.error.URLError('network down')):
+            success, message = app.send_teams_notification('https://example.com/webhook', status)
+        self.assertFalse(success)
+        self.assertIn('Failed to send notification', message)
+
+    def test_snapshot_writer_drops_unwritable_batch_and_keeps_running(self):
+        written = []
+        failed = threading.Event()
+        wrote = threading.Event()
+
+        class _Store:
+            def append(self, records):
+                records = list(records)
+                if any(record.get('bad') for record in records):
+                    failed.set()
+                    raise TypeError('not JSON serialisable')
+                written.extend(records)
+                wrote.set()
+
+        store = _Store()
+        writer = app.CoalescingSnapshotWriter(lambda: store, delay=0)
+        with self.assertLogs('aba.enterprise.persistence', 'ERROR') as logs:
+            writer.append([{'id': 'x', 'bad': True}])
+            self.assertTrue(failed.wait(timeout=5))
+            # The same writer thread must survive and pick up the next batch.
+            writer.append([{'id': 's1'}])
+            self.assertTrue(wrote.wait(timeout=5))
+        self.assertEqual(written, [{'id': 's1'}])
+        self.assertIn('Dropped 1 sign-in records', logs.output[0])
+
+    @unittest.skipUnless(persistence._pa_csv, 'pyarrow is not installed')
+    def test_pyarrow_and_csv_module_load_identical_records(self):
+        # Quoted headers, leading zeros and numeric-looking phones must survive
+        # both parsers unchanged, and a byte order mark must not make pyarrow
+        # read headers the csv module does not see.
+        rows = (
+            '"ID",Name,"Phone",Site,Contact_Name,Contact_Phone\n'
+            '007,"Smith, Ann",0155501000,Chicago,Supervisor Sid,5550301\n'
+            '008, Lee Bo ,5550200,Fort Wayne,,\n'
+        )
+        for data in (rows.encode('utf-8'), rows.encode('utf-8-sig')):
+            with self.subTest(bom=data.startswith(b'\xef\xbb\xbf')):
+                # pyarrow must accept the file, or the first load silently falls back.
+                self.assertIsNotNone(persistence._arrow_table(io.BytesIO(data)))
+                loaded = []
+                for threshold in (0, float('inf')):
+                    with mock.patch.object(persistence, 'ARROW_CSV_THRESHOLD', threshold):
+                        app.load_csv(io.TextIOWrapper(io.BytesIO(data), encoding='utf-8', newline=''), 'staff')
+                    loaded.append(app.DATA['staff'])
+                self.assertEqual(loaded[0], loaded[1])
+                if loaded[0]:
+                    self.assertEqual(loaded[0]['007']['phone'], '0155501000')
+
+    def test_runtime_log_tail_read_matches_full_read(self):
+        store = app.RuntimeSnapshotStore(tempfile.mkdtemp(dir=_RUNTIME_ROOT))
+        records = [{'id': f's{index}', 'name': 'x' * (index % 7)} for index in range(50)]
+        store.append(records)
+        # Tiny blocks make the backwards read cross many line boundaries.
+        with mock.patch.object(persistence, 'LOG_TAIL_BLOCK', 16):
+            for limit in (1, 2, 7, 49, 50, 51, 500):
+                with self.subTest(limit=limit):
+                    self.assertEqual(store.load(limit=limit), records[-limit:])
+        self.assertEqual(store.load(), records)
+
+    def test_runtime_log_tail_read_skips_blank_and_torn_lines(self):
+        runtime_dir = tempfile.mkdtemp(dir=_RUNTIME_ROOT)
+        store = app.RuntimeSnapshotStore(runtime_dir)
+        records = [{'id': f's{index}'} for index in range(10)]
+        log = b''.join(json.dumps(record).encode('utf-8') + b'\n\n{"torn\n' for record in records)
+        with open(os.path.join(runtime_dir, 'signins.jsonl'), 'wb') as fh:
+            fh.write(log)
+        with mock.patch.object(persistence, 'LOG_TAIL_BLOCK', 16):
+            for limit in (1, 3, 10, 20):
+                with self.subTest(limit=limit):
+                    self.assertEqual(store.load(limit=limit), records[-limit:])
+
+        class Unseekable(io.BytesIO):
+            def seekable(self):
+                return False
+
+        self.assertEqual(store.read_log(Unseekable(log), limit=3), records[-3:])
+
+    def test_save_settings_writes_outside_the_state_lock(self):
+        saved = []
+
+        def fake_save(store, settings):
+            saved.append((app.STATE_LOCK.locked(), settings))
+
+        app.SETTINGS['teams_webhook_url'] = 'https://example.com/webhook'
+        with mock.patch.object(app.SettingsStore, 'save', fake_save):
+            app.save_settings()
+        self.assertEqual(saved, [(False, {'teams_webhook_url': 'https://example.com/webhook'})])
+
+    def test_legacy_snapshot_is_migrated_into_the_log(self):
+        runtime_dir = tempfile.mkdtemp(dir=_RUNTIME_ROOT)
+        legacy = [{'id': 's1', 'action': 'sign_in'}]
+        with open(os.path.join(runtime_dir, 'signins.json'), 'w', encoding='utf-8') as fh:
+            json.dump(legacy, fh)
+        store = app.RuntimeSnapshotStore(runtime_dir)
+        self.assertEqual(store.load(), legacy)
+
+        store.append([{'id': 's2', 'action': 'sign_in'}])
+        # A restart reads the log only; the legacy history must be in it.
+        restarted = app.RuntimeSnapshotStore(runtime_dir)
+        self.assertEqual(restarted.load(), legacy + [{'id': 's2', 'action': 'sign_in'}])
+        self.assertFalse(os.path.exists(os.path.join(runtime_dir, 'signins.json')))
+        self.assertTrue(os.path.exists(os.path.join(runtime_dir, 'signins.json.migrated')))
+
+    def test_save_runtime_state_keeps_the_full_log(self):
+        runtime_dir = tempfile.mkdtemp(dir=_RUNTIME_ROOT)
+        store = app.RuntimeSnapshotStore(runtime_dir)
+        store.save([{'id': f's{index}'} for index in range(5)])
+        app.DATA['signins'] = [{'id': 's4'}]
+        with mock.patch('app.RUNTIME_DIR', runtime_dir):
+            app.save_runtime_state()
+        self.assertEqual(len(store.load()), 5)
+
+
+class MultipartParserTestCase(unittest.TestCase):
+    """Drive the streaming multipart parser over awkward and malformed bodies."""
+
+    BOUNDARY = b'BOUND'
+
+    def _file_part(self, content, name='file', filename='data.csv'):
+        return (
+            b'--BOUND\r\n'
+            b'Content-Disposition: form-data; name="' + name.encode() + b'"; filename="'
+            + filename.encode() + b'"\r\n\r\n' + content + b'\r\n'
+        )
+
+    def _parse(self, body, **kwargs):
+        parser = forms.MultipartParser(self.BOUNDARY, **kwargs)
+        return parser.parse(io.BytesIO(body), len(body))
+
+    def _field_part(self, name, value):
+        return (
+            b'--BOUND\r\nContent-Disposition: form-data; name="' + name.encode() + b'"\r\n\r\n'
+            + value + b'\r\n'
+        )
+
+    def _assert_pool_has_no_duplicates(self):
+        pooled = list(forms._MEMORY_SPOOL_POOL.queue) + list(forms._DISK_SPOOL_POOL.queue)
+        self.assertEqual(len(pooled), len({id(handle) for handle in pooled}))
+
+    def test_delimiters_split_across_reads_are_recognised(self):
+        # The file body contains CRLFs and near-miss delimiters.
+        content = b'id,name\r\ns1,Alice\r\n--BOUN\r\n-BOUND\r\n'
+        body = self._field_part('category', b'staff') + self._file_part(content) + b'--BOUND--\r\n'
+        for chunk_size in (1, 2, 3, 5, 7, 11, len(body)):
+            with self.subTest(chunk_size=chunk_size):
+                form = self._parse(body, chunk_size=chunk_size)
+                try:
+                    self.assertEqual(form.fields, {'category': 'staff'})
+                    upload = form.files['file']
+                    self.assertEqual(upload.filename, 'data.csv')
+                    self.assertEqual(upload.file.read(), content)
+                finally:
+                    form.close()
+
+    def test_preamble_and_epilogue_are_ignored(self):
+        body = b'This is the preamble.\r\n' + self._field_part('site', b'Fort Wayne') + b'--BOUND--\r\nepilogue'
+        form = self._parse(body, chunk_size=4)
+        self.assertEqual(form.fields, {'site': 'Fort Wayne'})
+
+    def test_large_file_part_spills_to_disk(self):
+        content = b'0123456789' * 100
+        form = self._parse(self._file_part(content) + b'--BOUND--\r\n', chunk_size=64, spool_size=256)
+        try:
+            upload = form.files['file']
+            self.assertNotIsInstance(upload.file, io.BytesIO)
+            self.assertEqual(upload.file.read(), content)
+        finally:
+            form.close()
+        self._assert_pool_has_no_duplicates()
+
+    def test_oversized_field_is_rejected(self):
+        body = self._field_part('site', b'x' * (forms.MAX_FIELD_SIZE + 1)) + b'--BOUND--\r\n'
+        with self.assertRaisesRegex(forms.MultipartError, 'exceeds'):
+            self._parse(body)
+
+    def test_oversized_part_headers_are_rejected(self):
+        body = b'--BOUND\r\nX-Padding: ' + b'x' * (forms.MAX_PART_HEADER_SIZE + 1)
+        with self.assertRaisesRegex(forms.MultipartError, 'too large'):
+            self._parse(body, chunk_size=1024)
+
+    def test_malformed_part_headers_are_rejected(self):
+        for headers in (b'not a header', b'Content-Type: text/plain'):
+            with self.subTest(headers=headers):
+                body = b'--BOUND\r\n' + headers + b'\r\n\r\nvalue\r\n--BOUND--\r\n'
+                with self.assertRaises(forms.MultipartError):
+                    self._parse(body)
+
+    def test_truncated_body_is_rejected(self):
+        body = self._field_part('site', b'Fort Wayne') + self._file_part(b'x' * 1000)
+        with self.assertRaisesRegex(forms.MultipartError, 'closing boundary'):
+            self._parse(body, chunk_size=100)
+        # The client promises more bytes than it sends before closing.
+        stream = io.BytesIO(body)
+        with self.assertRaisesRegex(forms.MultipartError, 'Connection closed'):
+            forms.MultipartParser(self.BOUNDARY, chunk_size=100).parse(stream, len(body) + 100)
+        self._assert_pool_has_no_duplicates()
+
+    def test_malformed_body_returns_each_spool_to_the_pool_once(self):
+        body = self._file_part(b'x' * 100000) + b'--BOUNDXX'
+        with self.assertRaises(forms.MultipartError):
+            self._parse(body, chunk_size=4096)
+        self._assert_pool_has_no_duplicates()
+
+
+class SignInServerTestCase(unittest.TestCase):
+    """Exercise the public functionality exposed by the HTTP server."""
+
+    _SAMPLE_STAFF = {
+        's1': {
+            'id': 's1',
+            'name': 'Alice Therapist',
+            'email': 'alice@example.com',
+            'phone': '555-0100',
+            'site': 'Fort Wayne',
+            'contact_name': 'Supervisor Sue',
+            'contact_phone': '555-0101',
+        },
+    }
+    _SAMPLE_CLIENTS = {
+        'c1': {
+            'id': 'c1',
+            'name': 'Bobby Learner',
+            'contact_name': 'Parent Patty',
+            'contact_phone': '555-0201',
+            'site': 'Fort Wayne',
+        },
+        'c2': {
+            'id': 'c2',
+            'name': 'Charlie Learner',
+            'contact_name': 'Parent Paul',
+            'contact_phone': '555-0202',
+            'site': 'Fort Wayne',
+        },
+    }
+    # Every entry is scheduled for today; _populate_sample_data fills in the date.
+    _SAMPLE_SCHEDULE = (
+        {
+            'person_type': 'staff',
+            'id': 's1',
+            'start_time': '09:00',
+            'end_time': '17:00',
+            'site': 'Fort Wayne',
+        },
+        {
+            'person_type': 'client',
+            'id': 'c1',
+            'start_time': '09:00',
+            'end_time': '11:00',
+            'site': 'Fort Wayne',
+        },
+        {
+            'person_type': 'client',
+            'id': 'c2',
+            'start_time': '10:00',
+            'end_time': '12:00',
+            'site': 'Fort Wayne',
+        },
+    )
+
+    @classmethod
+    def setUpClass(cls):
+        # Computed once; tests check content, not exact timestamps.
+        cls.today = datetime.date.today().isoformat()
+        cls.now_iso = datetime.datetime.now().isoformat(timespec='seconds')
+        # No test may reach the network; tests that exercise the webhook path
+        # patch urlopen again with the behaviour they need.
+        urlopen_patcher = mock.patch(
+            'urllib.request.urlopen', side_effect=AssertionError('tests must not open network connections')
+        )
+        urlopen_patcher.start()
+        cls.addClassCleanup(urlopen_patcher.stop)
+        # One server serves every test; handlers read the module-level state
+        # that setUp resets, so nothing carries over between tests. It is
+        # threaded so a test's kept-alive connection cannot block another one.
+        cls.server = app.SignInHTTPServer(('localhost', 0), _KeepAliveHandler)
+        cls.port = cls.server.server_address[1]
+        # A short poll interval lets shutdown() return promptly at teardown
+        # instead of waiting out the default half-second select timeout.
+        cls.server_thread = threading.Thread(
+            target=cls.server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True
+        )
+        cls.server_thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.server_thread.join(timeout=5)
+
+    def setUp(self):
+        _reset_state()
+        # Only the persistence test needs sign-ins written to disk.
+        app.PERSIST_RUNTIME = False
+        self.addCleanup(setattr, app, 'PERSIST_RUNTIME', True)
+        self._conn = http.client.HTTPConnection('localhost', self.port)
+        self.addCleanup(self._conn.close)
+        # Each test gets a fresh runtime directory under the module root so
+        # tests do not affect each other; it is removed in one go afterwards.
+        # Cleanups run last-in first-out, so queued sign-ins are flushed first.
+        app.RUNTIME_DIR = tempfile.mkdtemp(dir=_RUNTIME_ROOT)
+        self.addCleanup(shutil.rmtree, app.RUNTIME_DIR, ignore_errors=True)
+        self.addCleanup(app.flush_runtime_state)
+
+    # Helper utilities -------------------------------------------------
+    def _populate_sample_data(self):
+        # Records are copied so a test that edits one cannot leak into the next.
+        app.DATA['staff'] = {key: dict(value) for key, value in self._SAMPLE_STAFF.items()}
+        app.DATA['clients'] = {key: dict(value) for key, value in self._SAMPLE_CLIENTS.items()}
+        app.DATA['schedule'] = [dict(entry, date=self.today) for entry in self._SAMPLE_SCHEDULE]
+
+    def _request(self, method, path, body=None, headers=None):
+        self._conn.request(method, path, body=body, headers=headers or {})
+        response = self._conn.getresponse()
+        data = response.read()
+        return response.status, response.getheader('Content-Type'), data
+
     # Integration tests ------------------------------------------------
     def test_sign_in_flow_updates_history_and_dashboard(self):
         self._populate_sample_data()
-        self._start_server()
+        app.PERSIST_RUNTIME = True
 
         # Submit a staff sign-in via form encoded POST.
-        body = 'person=staff%7Cs1&action=sign_in&site=Fort+Wayne'
-        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-        status, content_type, payload = self._request('POST', '/sign_action', body, headers)
+        status, content_type, payload = self._request('POST', '/sign_action', _SIGN_IN_BODY, _FORM_HEADERS)
         self.assertEqual(status, 200)
-        html = payload.decode('utf-8')
-        self.assertIn('Successfully recorded Sign In for Alice Therapist', html)
+        self.assertIn(b'Successfully recorded Sign In for Alice Therapist', payload)
         self.assertEqual(app.DATA['signins'][-1]['action'], 'sign_in')
 
         # Runtime snapshot should be written and reloadable.
-        snapshot_path = os.path.join(app.RUNTIME_DIR, 'signins.json')
-        self.assertTrue(os.path.exists(snapshot_path))
-        with open(snapshot_path, 'r', encoding='utf-8') as fh:
-            saved = json.load(fh)
+        app.flush_runtime_state()
+        snapshot_path = pathlib.Path(app.RUNTIME_DIR, 'signins.jsonl')
+        self.assertTrue(snapshot_path.exists())
+        snapshot = snapshot_path.read_bytes()
+        saved = [json.loads(line) for line in snapshot.splitlines()]
         self.assertEqual(saved[-1]['name'], 'Alice Therapist')
 
-        # Clear sign-ins and load from runtime snapshot.
+        # Clear sign-ins and reload them from the snapshot already read.
         app.DATA['signins'] = []
-        app.load_runtime_state()
+        app._load_runtime_from(io.BytesIO(snapshot))
         self.assertEqual(app.DATA['signins'][-1]['name'], 'Alice Therapist')
 
         # Admin dashboard should show staff as present.
         status, _, payload = self._request('GET', '/admin')
         self.assertEqual(status, 200)
-        admin_html = payload.decode('utf-8')
-        self.assertIn('Alice Therapist', admin_html)
-        self.assertIn('Present', admin_html)
+        self.assertIn(b'Alice Therapist', payload)
+        self.assertIn(b'Present', payload)
 
-        # Now sign the staff member out and confirm dashboard updates.
-        body = 'person=staff%7Cs1&action=sign_out&site=Fort+Wayne'
-        status, _, _ = self._request('POST', '/sign_action', body, headers)
+        # Now sign the staff member out; the dashboard rendering of an absent
+        # row is covered by test_admin_dashboard_marks_signed_out_staff_absent.
+        status, _, _ = self._request('POST', '/sign_action', _SIGN_OUT_BODY, _FORM_HEADERS)
         self.assertEqual(status, 200)
+        self.assertEqual(app.DATA['signins'][-1]['action'], 'sign_out')
+        staff_row = app.REPORTING_SERVICE.build_schedule_matrix(self.today)[0]
+        self.assertEqual((staff_row['name'], staff_row['status']), ('Alice Therapist', 'Absent'))
+
+    def test_admin_dashboard_marks_signed_out_staff_absent(self):
+        self._populate_sample_data()
+        app.DATA['signins'] = [
+            {
+                'person_type': 'staff',
+                'id': 's1',
+                'name': 'Alice Therapist',
+                'site': 'Fort Wayne',
+                'timestamp': self.now_iso,
+                'action': action,
+            }
+            for action in ('sign_in', 'sign_out')
+        ]
         status, _, payload = self._request('GET', '/admin')
         self.assertEqual(status, 200)
-        admin_html = payload.decode('utf-8')
-        self.assertIn('Absent', admin_html)
+        self.assertIn(b'<td>Alice Therapist</td><td>09:00</td><td>17:00</td><td>Fort Wayne</td><td>Absent</td>', payload)
+        self.assertIn(b'<td>Sign Out</td>', payload)
+
+    def test_sign_action_accepts_multipart_forms(self):
+        self._populate_sample_data()
+        fields = (('person', 'staff|s1'), ('action', 'sign_in'), ('site', 'Fort Wayne'))
+        body = ''.join(
+            f'--{_UPLOAD_BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+            for name, value in fields
+        ) + f'--{_UPLOAD_BOUNDARY}--\r\n'
+        status, _, payload = self._request('POST', '/sign_action', body.encode('utf-8'), _UPLOAD_HEADERS)
+        self.assertEqual(status, 200)
+        self.assertIn(b'Successfully recorded Sign In for Alice Therapist', payload)
+
+        # A body cut off before its closing boundary is an invalid form.
+        status, _, payload = self._request('POST', '/sign_action', body[:-12].encode('utf-8'), _UPLOAD_HEADERS)
+        self.assertEqual(status, 200)
+        self.assertIn(b'Invalid form submission.', payload)
+        self.assertEqual(len(app.DATA['signins']), 1)
 
     def test_emergency_page_lists_present_and_missing(self):
         self._populate_sample_data()
         # Mark one staff and one client as present; leave second client absent.
-        now = datetime.datetime.now().isoformat(timespec='seconds')
         app.DATA['signins'] = [
             {
                 'person_type': 'staff',
                 'id': 's1',
                 'name': 'Alice Therapist',
                 'site': 'Fort Wayne',
-                'timestamp': now,
+                'timestamp': self.now_iso,
                 'action': 'sign_in',
             },
             {
@@ -217,21 +570,18 @@ client,c4,invalid,09:00,11:00,Fort Wayne
                 'id': 'c1',
                 'name': 'Bobby Learner',
                 'site': 'Fort Wayne',
-                'timestamp': now,
+                'timestamp': self.now_iso,
                 'action': 'sign_in',
             },
         ]
-        self._start_server()
-
         status, _, payload = self._request('GET', '/emergency')
         self.assertEqual(status, 200)
-        html = payload.decode('utf-8')
-        self.assertIn('Alice Therapist', html)
-        self.assertIn('Bobby Learner', html)
+        self.assertIn(b'Alice Therapist', payload)
+        self.assertIn(b'Bobby Learner', payload)
         # Missing client (c2) should list contact information.
-        self.assertIn('Charlie Learner', html)
-        self.assertIn('Parent Paul', html)
-        self.assertIn('Complete Fire Drill Report', html)
+        self.assertIn(b'Charlie Learner', payload)
+        self.assertIn(b'Parent Paul', payload)
+        self.assertIn(b'Complete Fire Drill Report', payload)
 
     def test_emergency_page_preview_when_webhook_configured(self):
         self._populate_sample_data()
@@ -246,115 +596,135 @@ client,c4,invalid,09:00,11:00,Fort Wayne
                 'action': 'sign_in',
             }
         ]
-        self._start_server()
-
         status, _, payload = self._request('GET', '/emergency')
         self.assertEqual(status, 200)
-        html = payload.decode('utf-8')
-        self.assertIn('Preview Teams message', html)
-        self.assertIn('Alice Therapist', html)
-
-    def test_format_emergency_markdown_includes_present_and_missing(self):
-        status = {
-            'date': '2030-01-01',
-            'present': [
-                {
-                    'person_type': 'Staff',
-                    'person_id': 's1',
-                    'name': 'Alice',
-                    'site': 'Fort Wayne',
-                    'timestamp': '09:00',
-                }
-            ],
-            'missing': [
-                {
-                    'person_type': 'Client',
-                    'person_id': 'c1',
-                    'name': 'Bobby',
-                    'site': 'Fort Wayne',
-                    'contact_name': 'Parent Patty',
-                    'contact_phone': '555-0101',
-                }
-            ],
-        }
-        markdown = app.format_emergency_markdown(status)
-        self.assertIn('**Emergency Roll Call - 2030-01-01**', markdown)
-        self.assertIn('- Staff: Alice @ Fort Wayne (since 09:00)', markdown)
-        self.assertIn('- Client: Bobby (Site: Fort Wayne; Contact: Parent Patty, 555-0101)', markdown)
-
-    def test_send_teams_notification_handles_errors(self):
-        status = {
-            'date': '2030-01-01',
-            'present': [],
-            'missing': [],
-        }
-        with mock.patch('urllib.request.urlopen', side_effect=urllib.error.URLError('network down')):
-            success, message = app.send_teams_notification('https://example.com/webhook', status)
-        self.assertFalse(success)
-        self.assertIn('Failed to send notification', message)
+        self.assertIn(b'Preview Teams message', payload)
+        self.assertIn(b'Alice Therapist', payload)
 
     def test_notify_endpoint_uses_helper(self):
         self._populate_sample_data()
         app.SETTINGS['teams_webhook_url'] = 'https://example.com/webhook'
-        self._start_server()
 
-        with mock.patch('app.send_teams_notification', return_value=(True, 'ok')) as mocked:
+        delivered = threading.Event()
+
+        def fake_send(webhook, status):
+            delivered.set()
+            return True, 'ok'
+
+        with mock.patch('app.send_teams_notification', side_effect=fake_send) as mocked:
             status, _, payload = self._request('POST', '/notify_teams')
-        self.assertEqual(status, 200)
+            self.assertTrue(delivered.wait(timeout=5))
+        self.assertEqual(status, 202)
         mocked.assert_called_once()
-        self.assertIn('Notification Sent', payload.decode('utf-8'))
+        self.assertIn(b'Notification Queued', payload)
+
+    def test_html_is_gzipped_when_client_accepts_it(self):
+        conn = http.client.HTTPConnection('localhost', self.port)
+        conn.request('GET', '/load_data', headers={'Accept-Encoding': 'gzip'})
+        response = conn.getresponse()
+        payload = response.read()
+        conn.close()
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader('Content-Encoding'), 'gzip')
+        self.assertIn(b'Load Data', gzip.decompress(payload))
+
+        status, _, payload = self._request('GET', '/load_data')
+        self.assertEqual(status, 200)
+        self.assertIn(b'Load Data', payload)
+
+    def test_only_prerendered_pages_keep_their_gzip_form(self):
+        self._populate_sample_data()
+        gzip_headers = {'Accept-Encoding': 'gzip'}
+        cached = dict(app._GZIP_CACHE)
+        # The emergency page lists contact details and must not be retained.
+        status, _, payload = self._request('GET', '/emergency', headers=gzip_headers)
+        self.assertEqual(status, 200)
+        self.assertIn(b'Parent Paul', gzip.decompress(payload))
+        self.assertEqual(dict(app._GZIP_CACHE), cached)
+
+        page = app._load_data_page('')
+        self._request('GET', '/load_data', headers=gzip_headers)
+        entry = app._GZIP_CACHE[id(page)]
+        self.assertIs(entry[0], page)
+        self.assertEqual(gzip.decompress(entry[1]), page)
+
+    def test_http_09_request_gets_the_bare_body(self):
+        with socket.create_connection(('localhost', self.port), timeout=5) as sock:
+            sock.sendall(b'GET /load_data\r\n\r\n')
+            received = b''.join(iter(lambda: sock.recv(65536), b''))
+        self.assertTrue(received.lstrip().startswith(b'<!DOCTYPE html>'), received[:80])
+        self.assertIn(b'Load Data', received)
+
+    def test_static_files_are_cached_with_etag_and_confined(self):
+        static_dir = tempfile.mkdtemp(prefix="aba_static_")
+        self.addCleanup(shutil.rmtree, static_dir, ignore_errors=True)
+        with open(os.path.join(static_dir, 'site.css'), 'w', encoding='utf-8') as fh:
+            fh.write('body { color: black; }')
+        with mock.patch('app.STATIC_DIR', os.path.realpath(static_dir)), mock.patch.dict(app._STATIC_CACHE, clear=True):
+            conn = http.client.HTTPConnection('localhost', self.port)
+            conn.request('GET', '/static/site.css')
+            response = conn.getresponse()
+            self.assertEqual(response.read(), b'body { color: black; }')
+            etag = response.getheader('ETag')
+            self.assertEqual(response.status, 200)
+            self.assertEqual(response.getheader('Content-Type'), 'text/css')
+            conn.close()
+
+            status, _, payload = self._request('GET', '/static/site.css', headers={'If-None-Match': etag})
+            self.assertEqual(status, 304)
+            self.assertEqual(payload, b'')
+
+            status, _, _ = self._request('GET', '/static/../app.py')
+            self.assertEqual(status, 404)
+
+            # Other spellings of the same file share its single cache entry.
+            for path in ('/static/./site.css', '/static//site.css', '/static/x/../site.css'):
+                status, _, payload = self._request('GET', path)
+                self.assertEqual((status, payload), (200, b'body { color: black; }'))
+            self.assertEqual(len(app._STATIC_CACHE), 1)
 
     def test_upload_csv_replaces_data(self):
         self._populate_sample_data()
-        self._start_server()
 
-        boundary = '----WebKitFormBoundaryTEST'
-        new_staff_csv = (
-            'id,name,email,phone,site,contact_name,contact_phone\n'
-            's9,Zelda Therapist,zelda@example.com,555-0900,Chicago,Supervisor Sam,555-0901\n'
-        )
-        multipart_body = (
-            f'--{boundary}\r\n'
-            'Content-Disposition: form-data; name="category"\r\n\r\n'
-            'staff\r\n'
-            f'--{boundary}\r\n'
-            'Content-Disposition: form-data; name="file"; filename="staff.csv"\r\n'
-            'Content-Type: text/csv\r\n\r\n'
-            f'{new_staff_csv}\r\n'
-            f'--{boundary}--\r\n'
-        )
-        headers = {'Content-Type': f'multipart/form-data; boundary={boundary}'}
-        status, _, payload = self._request('POST', '/upload_csv', multipart_body.encode('utf-8'), headers)
+        status, _, payload = self._request('POST', '/upload_csv', _UPLOAD_STAFF_BODY, _UPLOAD_HEADERS)
         self.assertEqual(status, 200)
-        html = payload.decode('utf-8')
-        self.assertIn('Successfully loaded staff data', html)
+        self.assertIn(b'Successfully loaded staff data', payload)
         self.assertIn('s9', app.DATA['staff'])
         self.assertEqual(app.DATA['staff']['s9']['name'], 'Zelda Therapist')
 
+    def test_upload_csv_rejects_oversized_body_without_reading_it(self):
+        conn = http.client.HTTPConnection('localhost', self.port)
+        conn.putrequest('POST', '/upload_csv')
+        conn.putheader('Content-Type', 'multipart/form-data; boundary=xyz')
+        conn.putheader('Content-Length', str(app.APP_CONFIG.max_upload_bytes + 1))
+        conn.endheaders()
+        response = conn.getresponse()
+        payload = response.read()
+        conn.close()
+        self.assertEqual(response.status, 413)
+        self.assertEqual(response.getheader('Connection'), 'close')
+        self.assertIn(b'larger than the', payload)
+
     def test_firedrill_report_form_shows_reason_dropdowns(self):
         self._populate_sample_data()
         # Mark staff as present so at least one accounted for entry exists.
-        now = datetime.datetime.now().isoformat(timespec='seconds')
         app.DATA['signins'] = [
             {
                 'person_type': 'staff',
                 'id': 's1',
                 'name': 'Alice Therapist',
                 'site': 'Fort Wayne',
-                'timestamp': now,
+                'timestamp': self.now_iso,
                 'action': 'sign_in',
             }
         ]
-        self._start_server()
-
         status_code, content_type, payload = self._request('GET', '/firedrill_report')
         self.assertEqual(status_code, 200)
         self.assertIn('text/html', content_type)
         html = payload.decode('utf-8')
         self.assertIn('Fire Drill Report', html)
         self.assertIn('reason_client_c2', html)
-        for option in app.FIRE_DRILL_REASON_OPTIONS:
-            self.assertIn(option, html)
+        self.assertEqual(set(_REASON_OPTION_RE.findall(html)), set(app.FIRE_DRILL_REASON_OPTIONS))
 
     def test_firedrill_report_submission_downloads_csv(self):
         self._populate_sample_data()
@@ -369,25 +739,15 @@ client,c4,invalid,09:00,11:00,Fort Wayne
                 'action': 'sign_in',
             }
         ]
-        self._start_server()
-
-        body = (
-            'drill_datetime=2030-01-01T10%3A00'
-            '&location=Fort+Wayne+Center'
-            '&reason_client_c1=Sick%2FCalled+off'
-            '&reason_client_c2=On+community+outing'
-        )
-        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-        status_code, content_type, payload = self._request('POST', '/firedrill_report', body, headers)
+        status_code, content_type, payload = self._request('POST', '/firedrill_report', _FIRE_DRILL_BODY, _FORM_HEADERS)
         self.assertEqual(status_code, 200)
         self.assertIn('text/csv', content_type)
-        csv_text = payload.decode('utf-8')
-        self.assertIn('Fire Drill Date/Time,2030-01-01T10:00', csv_text)
-        self.assertIn('Fort Wayne Center', csv_text)
-        self.assertIn('Accounted For', csv_text)
-        self.assertIn('Not Accounted For', csv_text)
-        self.assertIn('Sick/Called off', csv_text)
-        self.assertIn('On community outing', csv_text)
+        self.assertIn(b'Fire Drill Date/Time,2030-01-01T10:00', payload)
+        self.assertIn(b'Fort Wayne Center', payload)
+        self.assertIn(b'Accounted For', payload)
+        self.assertIn(b'Not Accounted For', payload)
+        self.assertIn(b'Sick/Called off', payload)
+        self.assertIn(b'On community outing', payload)
 
 
 if __name__ == '__main__':